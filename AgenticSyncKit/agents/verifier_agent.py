@@ -1,36 +1,208 @@
 # agents/verifier_agent.py
 from __future__ import annotations
-import subprocess
+import glob, importlib.util, io, os, subprocess, sys, threading, traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import Tuple
 
+try:
+    from tracing import span
+except ImportError:  # kit not yet dropped into a PromptOps repo root
+    def span(name, **args): return nullcontext()
+try:
+    from input_cache import CACHE_PATH, PassCache, module_deps
+except ImportError:
+    PassCache = None
+
+def artifact_inputs() -> list:
+    """Compiled artifacts and the manifests that name them, as id_scan sees them."""
+    import id_scan, manifests
+    return [p.as_posix() for p in id_scan.artifact_files(Path(".")) + manifests.discover_manifests(Path("."))]
+
+def schema_inputs() -> list:
+    """The YAML files validate_prompts would validate (git ls-files, else one pruned walk)."""
+    spec = importlib.util.spec_from_file_location("validate_prompts", "tools/validate_prompts.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    root = Path(".").resolve()
+    return [p.relative_to(root).as_posix() for p in mod.discover_yaml_files(root)]
+
+# DocOps checks, run after the docs build: label, trace name, script, argv (None: call main()
+# in-process; a list: run `python script *argv` as its own process), and the files each reads
+# (globs, or callables returning paths, evaluated in the repo root). The repo modules a script
+# imports are added from its imports (input_cache.module_deps). A check whose inputs and
+# VERSION match its last pass is skipped.
+Check = namedtuple("Check", "label name script argv inputs")
+CHECKS = [
+    Check("GOLDEN", "golden", "tools/golden_diff.py", None,
+          ["docs/registry.yaml", "registry.yaml", "docs/goldens/**", "docs/out/**", "SPEC/goldens/**",
+           "Runtime_Prompt.md"]),
+    Check("TECHNIQUES", "techniques", "tools/cross_domain_technique_check.py", None,
+          ["PromptSpec.yaml", "docs/sources/techniques.yaml", "docs/out/SRS.md"]),
+    Check("IDS", "ids", "tools/id_integrity_check.py", None,
+          ["docs/sources/**", "Prompt_Checklist*.yaml", artifact_inputs]),
+    Check("FINGERPRINT", "fingerprint", "tools/fingerprint_sync.py", None,
+          ["sync_fingerprint.json", artifact_inputs]),
+    Check("SCHEMA", "schema", "tools/validate_prompts.py", ["--schema", "prompt_schema_min.json"],
+          ["prompt_schema_min.json", schema_inputs]),
+]
+VERSION = "2"  # bump when the check runner changes what a pass means
+
+def declared_inputs(c: Check):
+    """Input patterns of c, with callables expanded; run with the repo root as cwd.
+    None when they cannot be listed (the check then always runs)."""
+    pats = []
+    try:
+        for i in c.inputs:
+            pats += [glob.escape(p) for p in i()] if callable(i) else [i]
+        return pats + [glob.escape(m) for m in module_deps(c.script)]
+    except Exception:
+        return None
+
+@contextmanager
+def workspace(root: Path):
+    """cwd at the repo root and its modules importable, as for `python tools/x.py` there."""
+    prev_cwd, prev_path = os.getcwd(), list(sys.path)
+    os.chdir(root)
+    sys.path[:0] = [str(root), str(root / "tools")]
+    try:
+        yield
+    finally:
+        sys.path[:] = prev_path
+        os.chdir(prev_cwd)
+
+def active_checks(root: Path) -> list:
+    # schema validation only where a schema is present (as in CI)
+    return [c for c in CHECKS if c.name != "schema" or (root / "prompt_schema_min.json").exists()]
+
+class Result:
+    def __init__(self, returncode: int, stdout: str, stderr: str):
+        self.returncode, self.stdout, self.stderr = returncode, stdout, stderr
+
+def run_check(name: str, cmd, cwd):
+    with span(f"check.{name}", cmd=" ".join(cmd[1:])):
+        return subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+
+class _ThreadStream:
+    """sys.stdout/sys.stderr stand-in that routes writes to the current thread's buffer."""
+    def __init__(self, real):
+        self.real = real
+        self.local = threading.local()
+
+    def write(self, s):
+        return (getattr(self.local, "buf", None) or self.real).write(s)
+
+    def flush(self):
+        (getattr(self.local, "buf", None) or self.real).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.real, name)
+
+def run_inprocess(name: str, script: Path, out: _ThreadStream, err: _ThreadStream) -> Result:
+    """Import script as a fresh module and call its main(), like `python script` would."""
+    if not script.exists():
+        return Result(2, "", f"python: can't open file '{script}': [Errno 2] No such file or directory\n")
+    out.local.buf, err.local.buf = io.StringIO(), io.StringIO()
+    try:
+        with span(f"check.{name}", script=script.as_posix()):
+            # Registered under its own name while it runs: a check that hands its functions to
+            # a process pool (id_scan) needs them picklable as <module>.<function>
+            modname = script.stem
+            spec = importlib.util.spec_from_file_location(modname, script)
+            mod = importlib.util.module_from_spec(spec)
+            prev = sys.modules.get(modname)
+            sys.modules[modname] = mod
+            try:
+                spec.loader.exec_module(mod)
+                rc = mod.main()
+                rc = rc if isinstance(rc, int) else 0
+            except SystemExit as e:
+                rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                if not isinstance(e.code, (int, type(None))):
+                    err.local.buf.write(f"{e.code}\n")
+            except Exception:
+                traceback.print_exc(file=err.local.buf)
+                rc = 1
+            finally:
+                if prev is None:
+                    sys.modules.pop(modname, None)
+                else:
+                    sys.modules[modname] = prev
+        return Result(rc, out.local.buf.getvalue(), err.local.buf.getvalue())
+    finally:
+        out.local.buf = err.local.buf = None
+
 class Verifier:
     def __init__(self, repo_root: Path):
         self.root = repo_root
 
+    def run_checks(self, checks: list) -> list:
+        """Run checks concurrently over one shared workspace snapshot; in-process where possible."""
+        try:
+            from yaml_cache import snapshot
+        except ImportError:
+            snapshot = nullcontext
+        root = Path(self.root).resolve()
+        out, err = _ThreadStream(sys.stdout), _ThreadStream(sys.stderr)
+        sys.stdout, sys.stderr = out, err
+
+        def one(c):
+            if c.argv is None:
+                return run_inprocess(c.name, root / c.script, out, err)
+            return run_check(c.name, ["python", c.script, *c.argv], root)
+        try:
+            with workspace(root), snapshot(), ThreadPoolExecutor(max_workers=max(1, len(checks))) as ex:
+                return list(ex.map(one, checks))
+        finally:
+            sys.stdout, sys.stderr = out.real, err.real
+
+    def pass_cache(self):
+        if PassCache is None:
+            return None
+        return PassCache(Path(self.root) / CACHE_PATH, base=Path(self.root))
+
+    def check_key(self, cache, c: Check) -> str:
+        with workspace(Path(self.root).resolve()):
+            pats = declared_inputs(c)
+            return None if pats is None else cache.key(pats, f"{VERSION}|{c.script}|{c.argv}")
+
     def run_docops(self) -> Tuple[bool, str]:
-        r = subprocess.run(["python","docs/builders/build_docs.py"], cwd=self.root, capture_output=True, text=True)
-        ok_build = (r.returncode == 0)
+        # The docs build writes what the checks read, so it runs first, as its own process
+        r = run_check("build_docs", ["python","docs/builders/build_docs.py"], self.root)
+        ok = (r.returncode == 0)
         out = r.stdout + "\n" + r.stderr
-        g = subprocess.run(["python","tools/golden_diff.py"], cwd=self.root, capture_output=True, text=True)
-        ok_golden = (g.returncode == 0)
-        out += "\n[GOLDEN]\n" + g.stdout + g.stderr
-        t = subprocess.run(["python","tools/cross_domain_technique_check.py"], cwd=self.root, capture_output=True, text=True)
-        ok_tecs = (t.returncode == 0)
-        out += "\n[TECHNIQUES]\n" + t.stdout + t.stderr
-        i = subprocess.run(["python","tools/id_integrity_check.py"], cwd=self.root, capture_output=True, text=True)
-        ok_ids = (i.returncode == 0)
-        out += "\n[IDS]\n" + i.stdout + i.stderr
-        f = subprocess.run(["python","tools/fingerprint_sync.py"], cwd=self.root, capture_output=True, text=True)
-        ok_fp = (f.returncode == 0)
-        out += "\n[FINGERPRINT]\n" + f.stdout + f.stderr
-        ok = ok_build and ok_golden and ok_tecs and ok_ids and ok_fp
+        cache = self.pass_cache()
+        checks, todo, skipped = active_checks(Path(self.root)), [], {}
+        for c in checks:
+            rec = cache.last_pass(f"verify.{c.name}", self.check_key(cache, c)) if cache else None
+            if rec is not None:
+                skipped[c.name] = f"[SKIP] inputs and tool version unchanged since pass at {rec['at']}\n"
+            else:
+                todo.append(c)
+        results = dict(zip([c.name for c in todo], self.run_checks(todo)))
+        for c in checks:
+            if c.name in skipped:
+                out += f"\n[{c.label}]\n" + skipped[c.name]
+                continue
+            res = results[c.name]
+            ok = ok and res.returncode == 0
+            out += f"\n[{c.label}]\n" + res.stdout + res.stderr
+            if cache is not None:
+                key = self.check_key(cache, c) if res.returncode == 0 else None  # after the run: outputs are inputs too
+                if key is not None:
+                    cache.record(f"verify.{c.name}", key)
+                else:
+                    cache.forget(f"verify.{c.name}")
+        if skipped:
+            out += f"\n[SKIPPED] {', '.join(skipped)} (inputs unchanged)\n"
         return ok, out
 
     def run_promptops(self) -> Tuple[bool, str]:
         py = self.root / "project_sync_orchestrator.py"
         if py.exists():
-            r = subprocess.run(["python","project_sync_orchestrator.py"], cwd=self.root, capture_output=True, text=True)
+            r = run_check("promptops", ["python","project_sync_orchestrator.py"], self.root)
             return (r.returncode == 0), r.stdout + r.stderr
         return True, "[SKIP] project_sync_orchestrator.py missing"
 
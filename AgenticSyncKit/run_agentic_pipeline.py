@@ -8,39 +8,58 @@ from agents.reviewer_agent import propose_patches, save_patch
 from agents.patch_applier import apply_unified_diff
 from agents.verifier_agent import Verifier
 
+try:
+    from yaml_cache import load_yaml
+except ImportError:  # kit not yet dropped into a PromptOps repo root
+    def load_yaml(p): return yaml.safe_load(Path(p).read_text(encoding="utf-8"))
+try:
+    import tracing
+    from tracing import span
+except ImportError:
+    from contextlib import nullcontext as _null
+    tracing = None
+    def span(name, **args): return _null()
+
 def sh(cmd, cwd):
     return subprocess.run(cmd, cwd=cwd, text=True, capture_output=True)
 
 def main():
     repo = Path(".").resolve()
-    cfg = yaml.safe_load((repo / "config" / "agentic_config.yaml").read_text(encoding="utf-8"))
+    if tracing is not None:
+        tracing.init("run_agentic_pipeline")
+    cfg = load_yaml(repo / "config" / "agentic_config.yaml")
 
     mode = cfg.get("mode","sandbox")
     code_globs = cfg.get("code_globs", ["**/*.py"])
     reviewer_cfg = cfg.get("reviewer", {"enable": True, "output_patch":"agents/out/reviewer.patch"})
     verifier_cfg = cfg.get("verifier", {"enable": True})
 
-    indexer = RepoIndexer(repo, code_globs)
-    G = indexer.build_graph()
-    graph = indexer.write_artifacts(G, repo / "agents" / "out")
+    with span("index"):
+        indexer = RepoIndexer(repo, code_globs)
+        G = indexer.build_graph()
+        graph = indexer.write_artifacts(G, repo / "agents" / "out")
     impacted = graph.get("impacted", [])
 
     patch_path = repo / reviewer_cfg.get("output_patch", "agents/out/reviewer.patch")
     if reviewer_cfg.get("enable", True):
-        patch_text = propose_patches(repo, impacted)
-        save_patch(patch_text, patch_path)
+        with span("review", impacted=len(impacted)):
+            patch_text = propose_patches(repo, impacted)
+            save_patch(patch_text, patch_path)
         text = patch_text.strip()
         if text and ("--- " in text and "+++" in text):
-            ok = apply_unified_diff(patch_path, repo)
+            with span("apply_patch", bytes=len(patch_text)):
+                ok = apply_unified_diff(patch_path, repo)
             print(f"[apply patch] {'OK' if ok else 'FAILED'}")
         else:
             print("[apply patch] SKIP (no diff detected)")
 
-    sh(["python","docs/builders/build_docs.py"], repo)
+    with span("build_docs"):
+        sh(["python","docs/builders/build_docs.py"], repo)
 
     if verifier_cfg.get("enable", True):
         v = Verifier(repo)
-        ok, out = v.verify_all()
+        with span("verify"):
+            ok, out = v.verify_all()
         (repo / "agents" / "out" / "verifier.log").write_text(out, encoding="utf-8")
         print(out)
         if not ok:
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+artifact_cache.py
+Content-addressed store for PromptOps outputs (runtime prompt, coverage, report, badge).
+
+Entries live in <dir>/artifacts/<key[:2]>/<key>/ as plain files, so CI can share the
+store as an ordinary directory (e.g. actions/cache). Entries are written atomically;
+the store is size-bounded and evicts least recently used entries first.
+
+Config: sync_manifest.yaml -> cache: {enabled, dir, max_mb}; dir/enabled resolve through
+cache_config like every other cache (PROMPTOPS_CACHE_DIR, PROMPTOPS_CACHE=0 win).
+"""
+import hashlib, os, shutil
+from pathlib import Path
+from cache_config import DEFAULT_DIR, cache_dir, cache_enabled
+
+DEFAULT_MAX_MB = 256
+
+def combined_key(*parts) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class ArtifactCache:
+    def __init__(self, root=DEFAULT_DIR, max_mb=DEFAULT_MAX_MB, enabled=True):
+        self.root = Path(root) / "artifacts"
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self.enabled = enabled
+
+    @classmethod
+    def from_manifest(cls, manifest: dict):
+        cfg = manifest.get("cache", {}) or {}
+        return cls(cache_dir(manifest), cfg.get("max_mb", DEFAULT_MAX_MB), cache_enabled(manifest))
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str):
+        """Return {name: bytes} for a cached entry, or None."""
+        if not self.enabled:
+            return None
+        d = self._entry(key)
+        if not d.is_dir():
+            return None
+        try:
+            files = {p.name: p.read_bytes() for p in d.iterdir() if p.is_file()}
+            os.utime(d)  # mtime doubles as the LRU clock
+        except OSError:
+            return None
+        return files
+
+    def put(self, key: str, files: dict):
+        if not self.enabled:
+            return
+        d = self._entry(key)
+        tmp = d.parent / f".{key}.{os.getpid()}.tmp"
+        try:
+            tmp.mkdir(parents=True, exist_ok=True)
+            for name, data in files.items():
+                (tmp / name).write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+            if d.exists():
+                shutil.rmtree(d, ignore_errors=True)
+            os.replace(tmp, d)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for d in self.root.glob("*/*"):
+            if d.name.startswith("."):
+                continue
+            try:
+                size = sum(p.stat().st_size for p in d.iterdir())
+                entries.append((d.stat().st_mtime_ns, size, d))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, d in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(d, ignore_errors=True)
+            total -= size
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+cache_config.py
+Where PromptOps caches live and whether they are used, resolved the same way for every cache
+(artifacts, parsed YAML, patch plans, golden outlines, ID indexes/registry, stat and pass records).
+
+Precedence: env PROMPTOPS_CACHE_DIR / PROMPTOPS_CACHE=0, then the manifest's
+cache: {dir, enabled} (the bundle's manifest where a tool has one, else the sync manifest
+in the working directory), then .promptops-cache, enabled.
+"""
+import os
+from pathlib import Path
+
+DEFAULT_DIR = ".promptops-cache"
+MANIFEST_NAMES = ("sync_manifest.yaml", "prompt_sync_manifest.yaml")
+_SETTINGS = {}
+
+def manifest_settings(base: Path = Path(".")) -> dict:
+    """The cache: section of the sync manifest under base ({} if there is none)."""
+    key = os.path.abspath(base)
+    if key not in _SETTINGS:
+        cfg = {}
+        for name in MANIFEST_NAMES:
+            p = Path(base) / name
+            if p.exists():
+                # plain PyYAML: yaml_cache itself is configured from here
+                import yaml
+                try:
+                    doc = yaml.load(p.read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+                except (OSError, yaml.YAMLError):
+                    doc = {}
+                cfg = (doc.get("cache") if isinstance(doc, dict) else None) or {}
+                break
+        _SETTINGS[key] = cfg
+    return _SETTINGS[key]
+
+def settings(manifest: dict = None, base: Path = Path(".")) -> dict:
+    return (manifest.get("cache") or {}) if manifest is not None else manifest_settings(base)
+
+def cache_dir(manifest: dict = None, base: Path = Path(".")) -> Path:
+    """Cache root; a relative manifest dir resolves against base."""
+    if os.environ.get("PROMPTOPS_CACHE_DIR"):
+        return Path(os.environ["PROMPTOPS_CACHE_DIR"])
+    d = Path(settings(manifest, base).get("dir") or DEFAULT_DIR)
+    return d if d.is_absolute() or str(base) == "." else Path(base) / d
+
+def cache_enabled(manifest: dict = None, base: Path = Path(".")) -> bool:
+    if os.environ.get("PROMPTOPS_CACHE", "1") == "0":
+        return False
+    return bool(settings(manifest, base).get("enabled", True))
+
+def cache_path(*parts, manifest: dict = None, base: Path = Path(".")) -> Path:
+    return cache_dir(manifest, base).joinpath(*parts)
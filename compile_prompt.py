@@ -1,75 +1,373 @@
-
-import sys, os, yaml, json, re
+import sys, os, json, re, hashlib
+from collections import OrderedDict
+from pathlib import Path
 from typing import Dict, Any, List
+from cache_config import cache_enabled, cache_path
+from yaml_cache import load_yaml, loads as load_yaml_bytes
+from tracing import span
+
+PLAN_CACHE = cache_path("patch_plans") if cache_enabled() else None
+FIELD_OPS = {"replace", "append", "prepend", "remove"}
+INSERT_OPS = {"insert-before", "insert-after"}
+
+class Section:
+    """One PromptSpec section: interned id, parent link and precomputed numbering.
+
+    Fields other than id/title/content/children live in `extra`. `digest` is the
+    cached subtree hash used by the render cache; `touch()` clears it up to the root.
+    """
+    __slots__ = ("id", "title", "content", "children", "parent", "number", "level", "extra", "digest")
+
+    def __init__(self, data: dict, parent=None):
+        sid = data.get("id", "")
+        self.id = sys.intern(sid) if isinstance(sid, str) else sid
+        self.title = data.get("title", "")
+        self.content = data.get("content", "")
+        self.children = ()  # becomes a list only for sections that have children
+        self.parent = parent
+        self.number = ""
+        self.level = 1
+        rest = {k: v for k, v in data.items() if k not in ("id", "title", "content", "children")}
+        self.extra = rest or None
+        self.digest = None
+
+    def get(self, field, default=None):
+        if field in ("id", "title", "content", "children"):
+            return getattr(self, field)
+        return (self.extra or {}).get(field, default)
+
+    def set(self, field, value):
+        if field in ("id", "title", "content"):
+            setattr(self, field, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[field] = value
+        self.touch()
+
+    def touch(self):
+        node = self
+        while node is not None and node.digest is not None:
+            node.digest = None
+            node = node.parent
+
+    def to_dict(self) -> dict:
+        d = {"id": self.id, "title": self.title, "content": self.content}
+        if self.extra:
+            d.update(self.extra)
+        d["children"] = [c.to_dict() for c in self.children]
+        return d
+
+def build_sections(items, parent=None, level=1, numbering_prefix="", idx=None):
+    """Turn raw section dicts into Sections in one iterative pass.
+
+    Sets parent links and numbering and fills `idx` (ID -> Section) on the way.
+    """
+    out = []
+    stack = [(items or [], out, parent, level, numbering_prefix)]
+    while stack:
+        raw, dest, par, lvl, prefix = stack.pop()
+        for i, d in enumerate(raw, start=1):
+            s = Section(d, par)
+            s.number, s.level = f"{prefix}{i}", lvl
+            dest.append(s)
+            if idx is not None and s.id:
+                idx[s.id] = s
+            if d.get("children"):
+                s.children = []
+                stack.append((d["children"], s.children, s, lvl+1, f"{s.number}."))
+    return out
 
-def load_yaml(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
-
-def index_sections(sections, idx=None):
-    if idx is None: idx = {}
-    for s in sections:
-        sid = s.get("id")
-        if sid:
-            idx[sid] = s
-        if s.get("children"):
-            index_sections(s["children"], idx)
-    return idx
-
-def apply_patches(spec: dict, patches: List[dict]):
-    # Build ID index
-    idx = index_sections(spec.get("sections", []))
-    for p in patches:
-        tid = p.get("target_id")
-        field = p.get("field", "content")
-        op = p.get("op", "replace")
-        val = p.get("value", "")
-        node = idx.get(tid)
-        if not node:
-            print(f"[WARN] Patch target_id {tid} not found; skipping.")
+def renumber(sections, level, numbering_prefix):
+    stack = [(sections, level, numbering_prefix)]
+    while stack:
+        nodes, lvl, prefix = stack.pop()
+        for i, s in enumerate(nodes, start=1):
+            s.number, s.level = f"{prefix}{i}", lvl
+            if s.children:
+                stack.append((s.children, lvl+1, f"{s.number}."))
+
+class SpecTree:
+    """Parsed PromptSpec: meta, root sections and the ID index, built in one pass."""
+    __slots__ = ("meta", "roots", "index", "extra")
+
+    def __init__(self, data: dict):
+        data = data or {}
+        self.meta = data.get("meta", {})
+        self.index = {}
+        self.roots = build_sections(data.get("sections", []), idx=self.index)
+        rest = {k: v for k, v in data.items() if k not in ("meta", "sections")}
+        self.extra = rest or None
+
+    def siblings(self, node: Section):
+        return node.parent.children if node.parent is not None else self.roots
+
+    def to_dict(self) -> dict:
+        d = {"meta": self.meta}
+        if self.extra:
+            d.update(self.extra)
+        d["sections"] = [s.to_dict() for s in self.roots]
+        return d
+
+def load_spec(path) -> SpecTree:
+    return SpecTree(load_yaml(path))
+
+def dict_ids(items) -> set:
+    ids, stack = set(), list(items)
+    while stack:
+        d = stack.pop()
+        if d.get("id"):
+            ids.add(d["id"])
+        stack.extend(d.get("children") or [])
+    return ids
+
+def resolve_plan(spec: SpecTree, patch_stack: List[tuple]):
+    """Flatten a stack of (source, patches) into an ordered, validated plan.
+
+    Targets are checked against the IDs that will exist at that point of the
+    stack (earlier inserts can be targeted by later patches). Steps that can
+    never apply are dropped and reported in `warnings`.
+    """
+    known = set(spec.index)
+    steps, warnings = [], []
+    for source, patches in patch_stack:
+        for p in patches or []:
+            tid = p.get("target_id")
+            op = p.get("op", "replace")
+            if tid not in known:
+                warnings.append(f"Patch target_id {tid} not found ({source}); skipping.")
+                continue
+            if op not in FIELD_OPS and op not in INSERT_OPS:
+                warnings.append(f"Unknown op {op} for {tid} ({source}); skipping.")
+                continue
+            step = {"target_id": tid, "op": op, "field": p.get("field", "content"), "value": p.get("value", "")}
+            if op in INSERT_OPS:
+                new = step["value"] if isinstance(step["value"], list) else [step["value"]]
+                if not all(isinstance(n, dict) for n in new):
+                    warnings.append(f"{op} for {tid} ({source}) needs section mappings as value; skipping.")
+                    continue
+                step["value"] = new
+                known |= dict_ids(new)
+            steps.append(step)
+    return {"steps": steps, "warnings": warnings}
+
+def apply_plan(spec: SpecTree, plan: dict):
+    for w in plan.get("warnings", []):
+        print(f"[WARN] {w}")
+    idx = spec.index
+    for step in plan.get("steps", []):
+        tid, op, field, val = step["target_id"], step["op"], step["field"], step["value"]
+        node = idx[tid]
+        if op in INSERT_OPS:
+            parent = node.parent
+            siblings = spec.siblings(node)
+            pos = next(i for i, s in enumerate(siblings) if s is node)
+            if op == "insert-after":
+                pos += 1
+            siblings[pos:pos] = build_sections(val, parent, idx=idx)
+            renumber(siblings, node.level, f"{parent.number}." if parent is not None else "")
+            if parent is not None:
+                parent.touch()
             continue
         cur = node.get(field, "")
         if op == "replace":
-            node[field] = val
+            node.set(field, val)
         elif op == "append":
-            node[field] = (cur or "") + str(val)
+            node.set(field, (cur or "") + str(val))
         elif op == "prepend":
-            node[field] = str(val) + (cur or "")
+            node.set(field, str(val) + (cur or ""))
         elif op == "remove":
-            node[field] = ""
+            node.set(field, "")
+    return spec
+
+def apply_patches(spec, patches: List[dict]):
+    """Apply one patch list to a SpecTree, or to a raw spec dict (updated in place), and return it."""
+    if isinstance(spec, SpecTree):
+        return apply_plan(spec, resolve_plan(spec, [("<patches>", patches)]))
+    tree = SpecTree(spec)
+    apply_patches(tree, patches)
+    spec.update(tree.to_dict())
+    return spec
+
+def plan_key(spec_bytes: bytes, patch_bytes: List[bytes]) -> str:
+    h = hashlib.sha256(spec_bytes)
+    for b in patch_bytes:
+        h.update(hashlib.sha256(b).digest())
+    return h.hexdigest()
+
+def load_plan(key: str):
+    if PLAN_CACHE is None:
+        return None
+    p = PLAN_CACHE / f"{key}.json"
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def store_plan(key: str, plan: dict):
+    if PLAN_CACHE is None:
+        return
+    p = PLAN_CACHE / f"{key}.json"
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(json.dumps(plan), encoding="utf-8")
+    except (OSError, TypeError, ValueError):
+        pass  # plan values that are not JSON-safe are simply not cached
+
+def as_sections(sections, level=1, numbering_prefix=""):
+    # Raw section dicts are still accepted and converted on the fly
+    if sections and not isinstance(sections[0], Section):
+        return build_sections(sections, level=level, numbering_prefix=numbering_prefix)
+    return sections
+
+class RenderCache:
+    """LRU of each section's own rendered chunk, keyed by (subtree hash, number, level).
+
+    A subtree hash covers id, title, content and the hashes of its children,
+    so an edit to one section only misses on the path from it to the root.
+    Entries hold one section's text, never its descendants', so the cache is
+    bounded by the size of the documents rendered, not by their depth.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        chunk = self.entries.get(key)
+        if chunk is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return chunk
+
+    def put(self, key, chunk):
+        self.entries[key] = chunk
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+RENDER_CACHE = RenderCache()
+
+def section_lines(s: Section):
+    lines = [f"# {'#'*(s.level-1)}{s.number}. {s.title}  [{s.id}]"]
+    content = (s.content or "").strip()
+    if content:
+        lines.append(content)
+        lines.append("")
+    return lines
+
+def subtree_digest(s: Section) -> bytes:
+    # Cached on the node; Section.touch() invalidates it along the parent chain.
+    # Post-order over an explicit stack, so nesting depth is unbounded
+    stack = [(s, False)]
+    while stack:
+        node, ready = stack.pop()
+        if node.digest is not None:
+            continue
+        if ready or not node.children:
+            h = hashlib.blake2b(repr((node.id, node.title, node.content)).encode("utf-8"), digest_size=16)
+            for c in node.children:
+                h.update(c.digest)
+            node.digest = h.digest()
         else:
-            print(f"[WARN] Unknown op {op} for {tid}; skipping.")
+            stack.append((node, True))
+            stack.extend((c, False) for c in node.children)
+    return s.digest
+
+def render_md(sections, level=1, numbering_prefix="", cache=None):
+    """The whole document, assembled from per-section chunks in one pre-order walk."""
+    cache = RENDER_CACHE if cache is None else cache
+    roots = as_sections(sections, level, numbering_prefix)
+    for s in roots:
+        subtree_digest(s)
+    chunks = []
+    stack = [iter(roots)]
+    while stack:
+        s = next(stack[-1], None)
+        if s is None:
+            stack.pop()
+            continue
+        key = (s.digest, s.number, s.level)
+        chunk = cache.get(key)
+        if chunk is None:
+            chunk = "\n".join(section_lines(s))
+            cache.put(key, chunk)
+        chunks.append(chunk)
+        if s.children:
+            stack.append(iter(s.children))
+    return "\n".join(chunks)
+
+def iter_md(sections, level=1, numbering_prefix=""):
+    """Yield the rendered Markdown in chunks; "".join(...) == render_md(...).
+
+    Walks the tree with an explicit stack, so nesting depth is unbounded and
+    nothing but the current path is held in memory.
+    """
+    first = True
+    stack = [iter(as_sections(sections, level, numbering_prefix))]
+    while stack:
+        s = next(stack[-1], None)
+        if s is None:
+            stack.pop()
+            continue
+        for line in section_lines(s):
+            if not first:
+                yield "\n"
+            yield line
+            first = False
+        if s.children:
+            stack.append(iter(s.children))
+
+def write_md(sections, out_path, buffering=1 << 20):
+    with open(out_path, "w", encoding="utf-8", buffering=buffering) as f:
+        f.writelines(iter_md(sections))
+
+def patch_paths_list(patches_path) -> List[str]:
+    if not patches_path:
+        return []
+    paths = [patches_path] if isinstance(patches_path, (str, os.PathLike)) else list(patches_path)
+    return [str(p) for p in paths if str(p).lower() != "none" and os.path.exists(p)]
+
+def build_spec(spec_path, patches_path=None) -> SpecTree:
+    """Load the spec and apply the patch stack (one path or a list, in order).
+
+    The resolved patch plan is cached under CACHE_DIR, keyed by the spec and
+    patch hashes.
+    """
+    spec_bytes = Path(spec_path).read_bytes()
+    spec = SpecTree(load_yaml_bytes(spec_bytes))
+    paths = patch_paths_list(patches_path)
+    if paths:
+        raw = [Path(p).read_bytes() for p in paths]
+        key = plan_key(spec_bytes, raw)
+        plan = load_plan(key)
+        if plan is None:
+            with span("compile.resolve_plan", patches=len(paths), bytes=sum(map(len, raw))):
+                plan = resolve_plan(spec, [(p, load_yaml_bytes(b)) for p, b in zip(paths, raw)])
+            store_plan(key, plan)
+        with span("compile.apply_plan", steps=len(plan["steps"])):
+            spec = apply_plan(spec, plan)
     return spec
 
-def render_md(sections, level=1, numbering_prefix=""):
-    md = []
-    for i, s in enumerate(sections, start=1):
-        number = f"{numbering_prefix}{i}"
-        title = s.get("title", "")
-        sid = s.get("id","")
-        md.append(f"# {'#'*(level-1)}{number}. {title}  [{sid}]")
-        content = s.get("content", "").strip()
-        if content:
-            md.append(content)
-            md.append("")
-        if s.get("children"):
-            md.append(render_md(s["children"], level+1, f"{number}."))
-    return "\n".join(md)
+def compile_spec(spec_path, patches_path=None):
+    """Library entry point: load -> apply the patch stack -> render, all in memory.
+
+    Returns (markdown, spec) so callers can check the result before writing it.
+    """
+    spec = build_spec(spec_path, patches_path)
+    with span("compile.render", sections=len(spec.index)):
+        return render_md(spec.roots), spec
 
 def main():
     if len(sys.argv) < 4:
-        print("Usage: python compile_prompt.py <PromptSpec.yaml> <PromptPatches.yaml|none> <out.md>")
+        print("Usage: python compile_prompt.py <PromptSpec.yaml> <PromptPatches.yaml|none> [more patches...] <out.md>")
         sys.exit(1)
-    spec_path, patches_path, out_path = sys.argv[1], sys.argv[2], sys.argv[3]
-    spec = load_yaml(spec_path)
-    patches = []
-    if patches_path.lower() != "none" and os.path.exists(patches_path):
-        patches = load_yaml(patches_path)
-    if patches:
-        spec = apply_patches(spec, patches)
-    md = render_md(spec.get("sections", []))
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(md)
+    spec_path, patch_paths, out_path = sys.argv[1], sys.argv[2:-1], sys.argv[-1]
+    spec = build_spec(spec_path, patch_paths)
+    # Stream straight to disk; large specs never exist as one string in memory
+    write_md(spec.roots, out_path)
     print(f"Wrote {out_path}")
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+coverage_engine.py
+Shared token lookup for prompt coverage (sync_orchestrator, prompt_coverage_checker).
+
+The runtime prompt is scanned once: every bracketed token "[...]" goes into a set,
+and any other literal tokens (e.g. free-text must_reference entries) are matched
+in the same text with a single Aho-Corasick pass. Lookups are then O(1) and give
+the same answer as re.search(re.escape(tok), text).
+"""
+from collections import deque
+from id_index import BRACKETED, IdIndex
+
+def _bracket_inner(tok: str):
+    m = BRACKETED.fullmatch(tok)
+    return m.group(1) if m else None
+
+class Automaton:
+    """Aho-Corasick matcher over a fixed set of literal tokens."""
+
+    def __init__(self, tokens):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [set()]
+        for tok in tokens:
+            if tok:
+                self._add(tok)
+        self._link()
+
+    def _add(self, tok):
+        node = 0
+        for ch in tok:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(set())
+            node = nxt
+        self.out[node].add(tok)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                cand = self.goto[f].get(ch, 0)
+                self.fail[nxt] = cand if cand != nxt else 0
+                self.out[nxt] |= self.out[self.fail[nxt]]
+
+    def find_all(self, text: str) -> set:
+        found = set()
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+    def iter_matches(self, text: str):
+        """Yield (start, token) for every occurrence, overlapping ones included."""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for tok in out[node]:
+                yield i - len(tok) + 1, tok
+
+class TokenIndex:
+    """Single-pass index of a text; `tok in index` matches a plain substring search."""
+
+    def __init__(self, text, tokens=()):
+        if isinstance(text, IdIndex):  # the artifact's positional index already holds every bracketed token
+            self.text, self.bracketed = text.text, text.ids.keys()
+        else:
+            self.text, self.bracketed = text, set(BRACKETED.findall(text))
+        literals = {t for t in tokens if t and _bracket_inner(t) is None}
+        self.literals = Automaton(literals).find_all(self.text) if literals else set()
+        self.known = literals
+
+    def __contains__(self, tok: str) -> bool:
+        inner = _bracket_inner(tok)
+        if inner is not None:
+            return inner in self.bracketed
+        if tok in self.known:
+            return tok in self.literals
+        return tok in self.text
+
+def checklist_tokens(checklist: dict) -> set:
+    """All must_reference tokens in a checklist (the only ones that may be unbracketed)."""
+    toks = set()
+    for t in checklist.get("tests", []) or []:
+        toks.update(t.get("must_reference", []) or [])
+    return toks
+
+def build_index(text: str, checklist: dict = None) -> TokenIndex:
+    return TokenIndex(text, checklist_tokens(checklist or {}))
+
+def as_index(text, tokens=()) -> TokenIndex:
+    return text if isinstance(text, TokenIndex) else TokenIndex(text, tokens)
@@ -1,16 +1,15 @@
 #!/usr/bin/env python3
-import sys, yaml, json, re
+import sys, json, re
 from pathlib import Path
+import id_index
+from coverage_engine import TokenIndex
+from yaml_cache import load_yaml
 
 BASE = Path(".")
 PSPEC = BASE / "PromptSpec.yaml"
 TECS = BASE / "docs" / "sources" / "techniques.yaml"
 SRS = BASE / "docs" / "out" / "SRS.md"
 
-def load_yaml(p: Path):
-    with open(p, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
-
 def main():
     # If no PromptSpec, nothing to verify
     if not PSPEC.exists():
@@ -35,8 +34,9 @@ def main():
 
     # Ensure compiled docs mention each technique ID (e.g., via the Techniques table)
     if SRS.exists():
-        srs_txt = SRS.read_text(encoding="utf-8")
-        absent = [t for t in req_tecs if t not in srs_txt]
+        # The SRS's id_index entry; bare mentions (table cells) are matched in its text in one pass
+        srs = TokenIndex(id_index.load(SRS), req_tecs)
+        absent = [t for t in req_tecs if t not in srs]
         if absent:
             print("Compiled SRS does not include technique IDs:", ", ".join(absent))
             return 1
@@ -5,20 +5,20 @@ Offline: structural checks (length, banned terms, coverage hooks).
 Online: plug-in your model via model_adapter.send_prompt.
 """
 import os, re, yaml, json
+from pathlib import Path
 from typing import List, Dict
 from model_adapter import send_prompt
+from lint_engine import LintEngine
+from yaml_cache import load_yaml
 
-def run_structural_checks(prompt_path: str) -> Dict:
+# Example rules, used when there is no sync_manifest.yaml to take them from
+DEFAULT_RULES = {"max_chars": 15000, "banned_phrases": ["we will try", "maybe", "sort of"]}
+
+def run_structural_checks(prompt_path: str, manifest_path: str = "sync_manifest.yaml") -> Dict:
     text = open(prompt_path, "r", encoding="utf-8").read()
-    issues = []
-    # Example rules
-    if len(text) > 15000:
-        issues.append("Prompt too long (>15k chars).")
-    banned = ["we will try", "maybe", "sort of"]
-    for b in banned:
-        if b in text.lower():
-            issues.append(f"Banned phrase found: {b}")
-    return {"len": len(text), "issues": issues}
+    mp = Path(manifest_path)
+    rules = (load_yaml(mp) or {}).get("structural", DEFAULT_RULES) if mp.exists() else DEFAULT_RULES
+    return LintEngine.from_rules(rules, mp.parent).lint(text)
 
 def run_behavioral_tests(prompt_path: str, inputs_dir: str) -> List[Dict]:
     text = open(prompt_path, "r", encoding="utf-8").read()
@@ -1,27 +1,143 @@
 #!/usr/bin/env python3
+"""
+fingerprint_sync.py
+Drift check for compiled outputs: IDs must not vanish between runs.
+
+sync_fingerprint.json keeps, per output, a Merkle tree of its sections (keyed by the
+heading's [SECTION-ID], else its title): each node has the hash of its own text, the IDs
+it mentions, and a hash over its own hash and its children's. IDs come from the artifact's
+id_index entry (via id_scan), placed in sections by line. Comparing two runs only
+descends into subtrees whose hashes differ, and dropped IDs are reported with the
+section they were last seen in. Every walk uses an explicit stack and the tree is stored
+flat (pre-order rows [parent, key, hash, own, ids]), so nesting depth is unbounded.
+"""
 import re, sys, hashlib, json
+from bisect import bisect_right
 from pathlib import Path
+import id_index, id_scan
 
 BASE = Path(".")
 OUTPUTS = {
     "runtime_prompt": BASE / "Runtime_Prompt.md",
     "srs": BASE / "docs" / "out" / "SRS.md",
 }
-ID_PATTERN = re.compile(r"\[([A-Z]{2,4}-\d{3,})\]")
+# "## Title" and the compiler's "# #1.2. Title  [SEC-ID]" both count their hashes as the level
+HEADING = re.compile(r"^(#+)[ \t]+(#*)(.*?)[ \t]*\r?$", re.MULTILINE)
+SECTION_KEY = re.compile(r"\[([^\[\]]+)\]$")
+
+def new_node(own: str):
+    return {"hash": "", "own": hashlib.sha256(own.encode("utf-8")).hexdigest(), "ids": [], "children": {}}
+
+def seal(root) -> str:
+    """Fill in every node's hash, children before parents."""
+    stack = [(root, False)]
+    while stack:
+        node, ready = stack.pop()
+        if not ready:
+            stack.append((node, True))
+            stack.extend((c, False) for c in node["children"].values())
+            continue
+        h = hashlib.sha256(node["own"].encode())
+        for key, child in node["children"].items():
+            h.update(b"\0" + key.encode("utf-8") + b"\0" + child["hash"].encode())
+        node["hash"] = h.hexdigest()
+    return root["hash"]
+
+def flatten(root) -> list:
+    """Pre-order rows [parent row, key, hash, own, ids]; the root is row 0 with parent -1."""
+    rows, stack = [], [(root, -1, "")]
+    while stack:
+        node, parent, key = stack.pop()
+        rows.append([parent, key, node["hash"], node["own"], node["ids"]])
+        me = len(rows) - 1
+        stack.extend((c, me, k) for k, c in reversed(list(node["children"].items())))
+    return rows
+
+def unflatten(rows) -> dict:
+    nodes = []
+    for parent, key, h, own, ids in rows:
+        node = {"hash": h, "own": own, "ids": ids, "children": {}}
+        if parent >= 0:
+            nodes[parent]["children"][key] = node
+        nodes.append(node)
+    return nodes[0]
+
+def load_sections(stored):
+    """Section tree from a stored fingerprint: flat rows, or the nested dicts older runs wrote."""
+    return unflatten(stored) if isinstance(stored, list) else stored
+
+def section_tree(idx: id_index.IdIndex) -> dict:
+    """Merkle tree of an indexed Markdown document; the root holds the text before the first heading."""
+    data = idx.text
+    heads = list(HEADING.finditer(data))
+    root = new_node(data[:heads[0].start()] if heads else data)
+    stack, nodes, first_lines, line, pos = [(0, root)], [root], [1], 1, 0
+    for i, m in enumerate(heads):
+        level = len(m.group(1)) + len(m.group(2))
+        end = heads[i + 1].start() if i + 1 < len(heads) else len(data)
+        line += data.count("\n", pos, m.start())
+        pos = m.start()
+        title = m.group(3).strip()
+        k = SECTION_KEY.search(title)
+        key = k.group(1) if k else title
+        while stack[-1][0] >= level:
+            stack.pop()
+        siblings = stack[-1][1]["children"]
+        if key in siblings:  # repeated titles: keep keys unique and stable by order
+            n = 2
+            while f"{key}#{n}" in siblings:
+                n += 1
+            key = f"{key}#{n}"
+        node = siblings[key] = new_node(data[m.start():end])
+        stack.append((level, node))
+        nodes.append(node)
+        first_lines.append(line)
+    # each indexed ID occurrence belongs to the section whose heading line precedes it
+    ids = [set() for _ in nodes]
+    for token in id_scan.ids_of(idx):
+        for ln, _col, _sec in idx.where(token):
+            ids[bisect_right(first_lines, ln) - 1].add(token)
+    for node, found in zip(nodes, ids):
+        node["ids"] = sorted(found)
+    seal(root)
+    return root
+
+def fingerprint_index(idx: id_index.IdIndex) -> dict:
+    return {"file_hash": idx.digest, "ids": id_scan.ids_of(idx), "sections": section_tree(idx)}
+
+def fingerprint_file(path) -> dict:
+    """file hash, IDs and section tree from the artifact's id_index entry."""
+    return fingerprint_index(id_index.load(path))
 
-def sha256_text(t: str) -> str:
-    return hashlib.sha256(t.encode("utf-8")).hexdigest()
+def diff_sections(old: dict, new: dict, path=()):
+    """Yield (section path, IDs no longer in that section) for every changed section, in document order.
 
-def scan_ids(txt: str):
-    return sorted(set(ID_PATTERN.findall(txt)))
+    Subtrees with equal hashes are skipped, so the walk costs O(changed sections).
+    A removed section (new is None) yields all of its IDs.
+    """
+    stack = [(old, new, path)]
+    while stack:
+        old, new, path = stack.pop()
+        if new is not None and old["hash"] == new["hash"]:
+            continue
+        if new is None or old["own"] != new["own"]:
+            new_ids = set(new["ids"]) if new is not None else set()
+            gone = [i for i in old["ids"] if i not in new_ids]
+            if gone:
+                yield path, gone
+        new_children = new["children"] if new is not None else {}
+        stack.extend((child, new_children.get(key), path + (key,))
+                     for key, child in reversed(list(old["children"].items())))
 
 def make_fp():
-    fp = {}
-    for k, p in OUTPUTS.items():
-        if p.exists():
-            txt = p.read_text(encoding="utf-8")
-            fp[k] = {"file_hash": sha256_text(txt), "ids": scan_ids(txt)}
-    return fp
+    # Named outputs keep their keys; every other compiled artifact is keyed by its path
+    paths = {k: p for k, p in OUTPUTS.items() if p.exists()}
+    named = {p.resolve() for p in paths.values()}
+    for p in id_scan.artifact_files(BASE):
+        if p.resolve() not in named:
+            paths[p.as_posix()] = p
+    scans = id_scan.scan_files(list(paths.values()), fn=fingerprint_file)
+    return {k: scans[p] for k, p in paths.items()}
 
 def main():
     new_fp = make_fp()
@@ -34,11 +150,22 @@ def main():
     problems = []
     for k in new_fp:
         new_ids = set(new_fp[k]["ids"])
-        old_ids = set(prev.get(k, {}).get("ids", []))
-        dropped = sorted(old_ids - new_ids)
-        if dropped:
-            problems.append(f"{k}: dropped IDs since last run -> {', '.join(dropped)}")
-    out.write_text(json.dumps(new_fp, indent=2), encoding="utf-8")
+        old = prev.get(k, {})
+        if "sections" not in old:  # fingerprint from before section trees: whole-file comparison
+            dropped = sorted(set(old.get("ids", [])) - new_ids)
+            if dropped:
+                problems.append(f"{k}: dropped IDs since last run -> {', '.join(dropped)}")
+            continue
+        # IDs that left a changed section and appear nowhere else in the file
+        where = {}
+        for path, gone in diff_sections(load_sections(old["sections"]), new_fp[k]["sections"]):
+            for i in gone:
+                if i not in new_ids:
+                    where.setdefault(i, []).append(" > ".join(path) or "(preamble)")
+        if where:
+            problems.append(f"{k}: dropped IDs since last run -> " + ", ".join(f"{i} (in {'; '.join(where[i])})" for i in sorted(where)))
+    stored = {k: {**fp, "sections": flatten(fp["sections"])} for k, fp in new_fp.items()}
+    out.write_text(json.dumps(stored, indent=2), encoding="utf-8")
     if problems:
         print("Sync fingerprint check found issues:")
         for p in problems: print("-", p)
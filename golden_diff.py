@@ -1,41 +1,169 @@
 #!/usr/bin/env python3
-import re, sys
+"""
+golden_diff.py
+Strict golden gate: every compiled document must have exactly its golden's heading outline.
+
+Pairs come from registry.yaml (docs/registry.yaml wins) -> documents[].golden / .output, plus
+the runtime prompt golden. Golden outlines are cached by golden file hash. Mismatches are
+reported as a Myers diff of the heading sequences: only inserted, removed and moved
+(reordered) anchors are listed. The diff gives up after MAX_EDITS edits; past that, the
+headings missing on either side are listed instead.
+"""
+import hashlib, json, os, re, sys
+from collections import Counter
 from pathlib import Path
+from cache_config import cache_enabled, cache_path
+from yaml_cache import load_yaml
 
 BASE = Path(".")
+OUTLINE_CACHE = cache_path("golden_outlines") if cache_enabled() else None
+MAX_REPORT = 50
+MAX_EDITS = 2 * MAX_REPORT  # a moved heading is two edits and one report line
 
-def headings_with_anchors(text: str):
-    heads = []
-    for line in text.splitlines():
+def outline(text: str) -> list:
+    """[(line number, normalized heading)]"""
+    out = []
+    for n, line in enumerate(text.splitlines(), 1):
         if line.startswith("#"):
-            ln = re.sub(r"\s+", " ", line.strip())
-            heads.append(ln)
+            out.append((n, re.sub(r"\s+", " ", line.strip())))
+    return out
+
+def golden_outline(path: Path) -> list:
+    """outline() of a golden, cached under OUTLINE_CACHE by content hash."""
+    data = path.read_bytes()
+    if OUTLINE_CACHE is None:
+        return outline(data.decode("utf-8"))
+    entry = OUTLINE_CACHE / f"{hashlib.sha256(data).hexdigest()}.json"
+    try:
+        return [tuple(h) for h in json.loads(entry.read_text(encoding="utf-8"))]
+    except (OSError, ValueError):
+        pass
+    heads = outline(data.decode("utf-8"))
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(heads), encoding="utf-8")
+        os.replace(tmp, entry)
+    except OSError:
+        pass
     return heads
 
+def myers(a: list, b: list, max_d: int = None):
+    """Shortest edit script turning a into b: [(op, i, j)], op '=' keep, '-' delete a[i], '+' insert b[j].
+
+    Myers' O((N+M)D) algorithm; round d keeps only its frontier v[-d..d] for the backtrack,
+    so memory is O(D^2). None when more than max_d edits are needed.
+    """
+    n, m = len(a), len(b)
+    limit = n + m if max_d is None else min(max_d, n + m)
+    off = limit + 1
+    v = [0] * (2 * limit + 3)  # v[off + k]: furthest x on diagonal k
+    trace, done = [], False
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            x = v[off + k + 1] if k == -d or (k != d and v[off + k - 1] < v[off + k + 1]) else v[off + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x, y = x + 1, y + 1
+            v[off + k] = x
+            if x >= n and y >= m:
+                done = True
+                break
+        trace.append(v[off - d:off + d + 1])
+        if done:
+            break
+    if not done:
+        return None
+    ops, x, y = [], n, m
+    for d in range(len(trace) - 1, -1, -1):
+        k = x - y
+        if d == 0:
+            prev_x = prev_y = 0
+        else:
+            row = trace[d - 1]  # v[-(d-1)..d-1] as left by round d-1, which round d extended
+            prev_k = k + 1 if k == -d or (k != d and row[k - 1 + d - 1] < row[k + 1 + d - 1]) else k - 1
+            prev_x = row[prev_k + d - 1]
+            prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x, y = x - 1, y - 1
+            ops.append(("=", x, y))
+        if d > 0:
+            ops.append(("+", None, prev_y) if x == prev_x else ("-", prev_x, None))
+        x, y = prev_x, prev_y
+    ops.reverse()
+    return ops
+
+def outline_diff(golden: list, compiled: list) -> list:
+    """Report lines for the inserted, removed and moved headings between two outlines."""
+    ops = myers([h for _, h in golden], [h for _, h in compiled], MAX_EDITS)
+    if ops is None:
+        return missing_diff(golden, compiled)
+    removed = {golden[i][1]: golden[i][0] for op, i, _ in ops if op == "-"}
+    inserted = {compiled[j][1]: compiled[j][0] for op, _, j in ops if op == "+"}
+    lines = []
+    for op, i, j in ops:
+        if op == "-" and golden[i][1] in inserted:
+            lines.append(f"  ~ moved:    {golden[i][1]}  (golden line {golden[i][0]} -> compiled line {inserted[golden[i][1]]})")
+        elif op == "-":
+            lines.append(f"  - removed:  {golden[i][1]}  (golden line {golden[i][0]})")
+        elif op == "+" and compiled[j][1] not in removed:
+            lines.append(f"  + inserted: {compiled[j][1]}  (compiled line {compiled[j][0]})")
+    return lines
+
+def missing_diff(golden: list, compiled: list) -> list:
+    """Linear fallback past MAX_EDITS: headings only in the golden, then only in the compiled output."""
+    lines = [f"  (more than {MAX_EDITS} edits; listing headings missing on either side, not moves)"]
+    extra = Counter(h for _, h in compiled)
+    extra.subtract(h for _, h in golden)
+    for line, h in golden:
+        if extra[h] < 0:
+            extra[h] += 1
+            lines.append(f"  - removed:  {h}  (golden line {line})")
+    extra = Counter(h for _, h in golden)
+    extra.subtract(h for _, h in compiled)
+    for line, h in compiled:
+        if extra[h] < 0:
+            extra[h] += 1
+            lines.append(f"  + inserted: {h}  (compiled line {line})")
+    return lines
+
 def compare(golden: Path, compiled: Path, label: str):
+    """(ok, report lines) for one golden/compiled pair."""
     if not golden.exists() or not compiled.exists():
-        print(f"[SKIP] {label}: missing files (golden: {golden.exists()}, compiled: {compiled.exists()})")
-        return True
-    g = golden.read_text(encoding="utf-8")
-    c = compiled.read_text(encoding="utf-8")
-    gh = headings_with_anchors(g)
-    ch = headings_with_anchors(c)
-    ok = gh == ch
-    if not ok:
-        print(f"[FAIL] {label}: headings/anchors do not match golden.")
-        print("Golden:", gh)
-        print("Compiled:", ch)
-    else:
-        print(f"[OK] {label}: headings/anchors match golden exactly.")
-    return ok
+        return True, [f"[SKIP] {label}: missing files (golden: {golden.exists()}, compiled: {compiled.exists()})"]
+    gh = golden_outline(golden)
+    ch = outline(compiled.read_text(encoding="utf-8"))
+    if [h for _, h in gh] == [h for _, h in ch]:
+        return True, [f"[OK] {label}: headings/anchors match golden exactly."]
+    diff = outline_diff(gh, ch)
+    out = [f"[FAIL] {label}: headings/anchors do not match golden ({len(diff)} difference(s)).", *diff[:MAX_REPORT]]
+    if len(diff) > MAX_REPORT:
+        out.append(f"  ... {len(diff) - MAX_REPORT} more")
+    return False, out
 
-def main():
-    ok = True
-    ok &= compare(Path("docs/goldens/SRS_golden.md"), Path("docs/out/SRS.md"), "SRS")
+def golden_pairs() -> list:
+    """[(golden, compiled, label)] from the document registry, plus the runtime prompt."""
+    pairs = []
+    for reg in (BASE / "docs" / "registry.yaml", BASE / "registry.yaml"):
+        if reg.exists():
+            for doc in (load_yaml(reg) or {}).get("documents", []) or []:
+                if doc.get("golden") and doc.get("output"):
+                    pairs.append((BASE / doc["golden"], BASE / doc["output"], doc.get("id") or doc["output"]))
+            break
+    if not pairs:
+        pairs.append((Path("docs/goldens/SRS_golden.md"), Path("docs/out/SRS.md"), "SRS"))
     gpr = Path("SPEC/goldens/Prompt_Runtime_Golden.md")
     rpr = Path("Runtime_Prompt.md")
     if gpr.exists() and rpr.exists():
-        ok &= compare(gpr, rpr, "Runtime Prompt")
+        pairs.append((gpr, rpr, "Runtime Prompt"))
+    return pairs
+
+def main():
+    ok = True
+    for golden, compiled, label in golden_pairs():
+        pair_ok, lines = compare(golden, compiled, label)
+        print("\n".join(lines))
+        ok &= pair_ok
     if not ok:
         sys.exit(1)
     print("Strict golden diff passed.")
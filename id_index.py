@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+id_index.py
+Positional index of bracketed IDs in a compiled artifact (Runtime_Prompt.md, docs/out/SRS.md).
+
+One pass over the artifact maps every bracketed token -> [(line, col, section)], where
+section is the ID of the enclosing heading ("# 1.2. Title  [SEC-ID]"). The index is
+persisted in the cache dir (<cache>/id_index/, one entry per artifact path) and rebuilt
+whenever the artifact's content hash changes. It is the one scan of an artifact:
+prompt_coverage_checker and cross_domain_technique_check answer their lookups from it
+(coverage_engine.TokenIndex over an IdIndex), and id_integrity_check and fingerprint_sync
+take IDs, locations and per-section IDs from it via id_scan.
+"""
+import hashlib, json, os, re
+from pathlib import Path
+from cache_config import cache_enabled, cache_path
+
+VERSION = 3
+# The token grammar shared by every scanner (coverage_engine, id_scan, the checks)
+ID_BODY = r"[A-Z]{2,4}-\d{3,}"                 # a registry ID, e.g. REQ-001
+BRACKETED = re.compile(r"\[([^\[\]\n]*)\]")      # any bracketed token on one line
+HEADING = re.compile(r"^#.*\[([^\[\]]+)\]\s*$")
+_MEMO = {}
+
+class IdIndex:
+    def __init__(self, ids: dict, digest: str, text: str = ""):
+        self.ids = ids        # token -> [[line, col, section], ...]
+        self.digest = digest  # sha256 of the artifact bytes
+        self.text = text
+
+    def __contains__(self, token):
+        return token in self.ids
+
+    def where(self, token) -> list:
+        return self.ids.get(token, [])
+
+    def matching(self, pattern) -> set:
+        """Indexed tokens that fully match pattern (e.g. ID_BODY)."""
+        pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        return {t for t in self.ids if pattern.fullmatch(t)}
+
+    def describe(self, token, limit: int = 5) -> str:
+        """'L12:C3 (SEC-ID); ...' for reports."""
+        locs = self.where(token)
+        out = "; ".join(f"L{line}:C{col} ({sec or '-'})" for line, col, sec in locs[:limit])
+        return out + (f"; +{len(locs) - limit} more" if len(locs) > limit else "")
+
+def build(text: str) -> dict:
+    ids, section = {}, None
+    # lines end at "\n" only, as editors and fingerprint_sync count them
+    for lineno, line in enumerate(text.split("\n"), 1):
+        if line.startswith("#"):
+            m = HEADING.match(line)
+            if m:
+                section = m.group(1)
+        for m in BRACKETED.finditer(line):
+            ids.setdefault(m.group(1), []).append([lineno, m.start() + 1, section])
+    return ids
+
+def sidecar(path: Path):
+    """Cache entry for the artifact at path (None with caching off)."""
+    if not cache_enabled():
+        return None
+    name = hashlib.sha256(os.path.realpath(path).encode("utf-8")).hexdigest()[:32]
+    return cache_path("id_index", f"{name}.json")
+
+def load(path) -> IdIndex:
+    """Index for the artifact at path, reusing the persisted sidecar while the content hash matches."""
+    path = Path(path)
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    text = data.decode("utf-8")
+    key = (str(path.resolve()), digest)
+    if key in _MEMO:
+        return _MEMO[key]
+    side = sidecar(path)
+    ids = None
+    try:
+        cached = json.loads(side.read_text(encoding="utf-8")) if side is not None else {}
+        if cached.get("version") == VERSION and cached.get("sha256") == digest:
+            ids = cached["ids"]
+    except (OSError, ValueError, KeyError):
+        pass
+    if ids is None:
+        ids = build(text)
+        if side is not None:
+            try:
+                side.parent.mkdir(parents=True, exist_ok=True)
+                tmp = side.with_name(f".{side.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps({"version": VERSION, "sha256": digest, "ids": ids}, separators=(",", ":")),
+                               encoding="utf-8")
+                os.replace(tmp, side)
+            except OSError:
+                pass  # unwritable cache: the index just isn't persisted
+    _MEMO[key] = IdIndex(ids, digest, text)
+    return _MEMO[key]
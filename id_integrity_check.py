@@ -1,77 +1,69 @@
 #!/usr/bin/env python3
-import re, sys, yaml, json
+import sys
 from pathlib import Path
+import id_scan
+from id_registry import IdRegistry
 
 BASE = Path(".")
-ID_PATTERN = re.compile(r"\[([A-Z]{2,4}-\d{3,})\]")
 ALLOWED_PREFIXES = {"REQ","ADR","TST","GLO","SEC","OBJ","PRC","ROL","INP","OUT","GRD","REF","CHG","TEC","INV"}
 
-def load_yaml(p: Path):
-    with open(p, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+CHECKLIST_KINDS = {"invariants": "invariant", "techniques": "technique", "outputs": "output", "tests": "test"}
 
-def gather_defined_ids() -> set:
-    ids = set()
-    # Docs sources
-    for p in [
-        BASE / "docs" / "sources" / "requirements.yaml",
-        BASE / "docs" / "sources" / "tests.yaml",
-        BASE / "docs" / "sources" / "glossary.yaml",
-    ]:
-        if p.exists():
-            data = load_yaml(p) or {}
-            for item in (data.get("items") or []):
-                if "id" in item: ids.add(item["id"])
-    # ADR dir
-    adr_dir = BASE / "docs" / "sources" / "adrs"
+def defining_sources() -> list:
+    """[(path, {top-level key: kind})] for every file that defines IDs."""
+    docs = BASE / "docs" / "sources"
+    sources = [(docs / f"{name}.yaml", {"items": kind})
+               for name, kind in (("requirements", "requirement"), ("tests", "test"), ("glossary", "glossary"))]
+    adr_dir = docs / "adrs"
     if adr_dir.exists():
-        for p in adr_dir.glob("*.yaml"):
-            data = load_yaml(p) or {}
-            for item in (data.get("items") or []):
-                if "id" in item: ids.add(item["id"])
+        sources += [(p, {"items": "adr"}) for p in sorted(adr_dir.glob("*.yaml"))]
     # Prompt checklist IDs (INV/TEC/OUT/TST-like)
-    for p in [BASE / "Prompt_Checklist_v1.0.yaml", BASE / "Prompt_Checklist.yaml"]:
-        if p.exists():
-            data = load_yaml(p) or {}
-            for k in ["invariants","techniques","outputs","tests"]:
-                for item in (data.get(k) or []):
-                    if "id" in item: ids.add(item["id"])
-    return ids
+    sources += [(BASE / name, CHECKLIST_KINDS) for name in ("Prompt_Checklist_v1.0.yaml", "Prompt_Checklist.yaml")]
+    return sources
+
+def open_registry() -> IdRegistry:
+    reg = IdRegistry()
+    reg.sync(defining_sources())
+    return reg
 
-def scan_ids_in_file(p: Path) -> set:
-    txt = p.read_text(encoding="utf-8")
-    return set(ID_PATTERN.findall(txt))
+def gather_defined_ids() -> set:
+    reg = open_registry()
+    try:
+        return reg.defined()
+    finally:
+        reg.close()
 
 def main():
-    defined = gather_defined_ids()
-    # Scan compiled outputs
-    files = []
-    rp = BASE / "Runtime_Prompt.md"
-    if rp.exists(): files.append(rp)
-    srs = BASE / "docs" / "out" / "SRS.md"
-    if srs.exists(): files.append(srs)
+    reg = open_registry()
+    # Index every compiled output (docs/out/, generated prompts); process pool for large trees
+    scans = id_scan.scan_files(id_scan.artifact_files(BASE))
     missing = {}
-    extraneous = set()
-    dupes = set() # duplicates across definitions are caught by set but we can add logic if needed
 
     # Ensure all bracket-IDs in outputs resolve to defined or allowed pseudo prefixes
-    for f in files:
-        seen = scan_ids_in_file(f)
-        for sid in seen:
-            pref = sid.split("-")[0]
-            if pref not in ALLOWED_PREFIXES and sid not in defined:
-                missing.setdefault(f.as_posix(), []).append(sid)
-            elif (pref in {"REQ","ADR","TST","GLO","TEC","INV"} and sid not in defined):
-                missing.setdefault(f.as_posix(), []).append(sid)
+    for f, idx in scans.items():
+        seen = id_scan.ids_of(idx)
+        # Unknown prefixes and the strictly defined kinds must resolve; other allowed prefixes may float
+        must_resolve = [sid for sid in seen
+                        if sid.split("-")[0] not in ALLOWED_PREFIXES or sid.split("-")[0] in {"REQ","ADR","TST","GLO","TEC","INV"}]
+        unresolved = reg.unresolved(must_resolve)
+        if unresolved:
+            missing[f.as_posix()] = (unresolved, idx)
 
-    # Check for duplicates in defined set by counting across sources
-    # (Simple approach: collect all and ensure unique. Real dup detection would need source mapping.)
-    # Here we just pass, because set eliminates dupes; you can extend to map provenance.
+    # Same ID defined more than once (possibly in different sources)
+    dupes = reg.duplicates()
+    reg.close()
 
+    if dupes:
+        print("Duplicate ID definitions:")
+        for sid, defs in dupes.items():
+            print(f"- {sid}: " + ", ".join(f"{src}:{line} ({kind})" for src, line, kind in defs))
     if missing:
         print("Unresolved IDs found in compiled artifacts:")
-        for fn, ids in missing.items():
+        for fn, (ids, idx) in missing.items():
             print(f"- {fn}: {sorted(set(ids))}")
+            for sid in sorted(set(ids)):
+                print(f"    {sid}: {idx.describe(sid)}")
+    if dupes or missing:
         sys.exit(1)
 
     print("ID integrity OK (all bracketed IDs resolve to known or allowed prefixes).")
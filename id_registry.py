@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+id_registry.py
+Persistent registry of defined IDs with provenance, backed by SQLite.
+
+Every defining source (docs sources, ADRs, the prompt checklist) contributes rows
+(id, kind, source, line). Sources are re-ingested only when their content (or kind labels)
+changes, so a run over tens of thousands of IDs is a delta update; duplicate and
+unresolved-reference checks are indexed queries.
+
+ID uniqueness is checked, not enforced: every definition is stored (UNIQUE (id, source, line)
+only keeps a re-ingest from doubling rows) and duplicates() reports IDs defined more than
+once, so id_integrity_check can list every location instead of rejecting the second one.
+
+Location: <cache dir>/id_registry.sqlite (see cache_config); in memory when caching is off
+"""
+import hashlib, sqlite3, yaml
+from pathlib import Path
+from cache_config import cache_enabled, cache_path
+from yaml_cache import Loader
+
+DB_PATH = cache_path("id_registry.sqlite") if cache_enabled() else None  # None: in-memory, rebuilt per run
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, sha256 TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS ids (
+    id TEXT NOT NULL, kind TEXT NOT NULL, source TEXT NOT NULL REFERENCES sources(path), line INTEGER NOT NULL,
+    UNIQUE (id, source, line)  -- also the lookup index for id
+);
+CREATE INDEX IF NOT EXISTS ids_by_source ON ids(source);
+"""
+
+def _mapping(node) -> dict:
+    if not isinstance(node, yaml.MappingNode):
+        return {}
+    return {k.value: v for k, v in node.value if isinstance(k, yaml.ScalarNode)}
+
+def extract_ids(data: bytes, kinds) -> list:
+    """[(id, kind, line)] for `- id: X` items under each top-level key in kinds.
+
+    kinds maps top-level key -> kind label. Parsed with compose() to keep line numbers.
+    """
+    root = _mapping(yaml.compose(data, Loader=Loader))
+    out = []
+    for key, kind in kinds.items():
+        seq = root.get(key)
+        if not isinstance(seq, yaml.SequenceNode):
+            continue
+        for item in seq.value:
+            node = _mapping(item).get("id")
+            if isinstance(node, yaml.ScalarNode) and node.value:
+                out.append((node.value, kind, node.start_mark.line + 1))
+    return out
+
+class IdRegistry:
+    def __init__(self, db_path: Path = DB_PATH):
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(":memory:" if db_path is None else str(db_path), timeout=30)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS ids; DROP TABLE IF EXISTS sources;")
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def sync(self, sources) -> list:
+        """Bring the registry in line with sources: [(path, kinds)], see extract_ids.
+
+        Returns the sources that were (re-)ingested.
+        """
+        known = dict(self.db.execute("SELECT path, sha256 FROM sources"))
+        wanted, ingested = set(), []
+        with self.db:
+            for path, kinds in sources:
+                path = Path(path)
+                if not path.exists():
+                    continue
+                key = path.as_posix()
+                wanted.add(key)
+                data = path.read_bytes()
+                # the kind labels are part of what was ingested, so a relabel re-ingests too
+                digest = hashlib.sha256(data + repr(sorted(kinds.items())).encode("utf-8")).hexdigest()
+                if known.get(key) == digest:
+                    continue
+                rows = extract_ids(data, kinds)
+                self.db.execute("DELETE FROM ids WHERE source = ?", (key,))
+                self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?)", (key, digest))
+                self.db.executemany("INSERT OR IGNORE INTO ids VALUES (?, ?, ?, ?)",
+                                    [(i, kind, key, line) for i, kind, line in rows])
+                ingested.append(key)
+            for gone in set(known) - wanted:
+                self.db.execute("DELETE FROM ids WHERE source = ?", (gone,))
+                self.db.execute("DELETE FROM sources WHERE path = ?", (gone,))
+        return ingested
+
+    def defined(self) -> set:
+        return {r[0] for r in self.db.execute("SELECT DISTINCT id FROM ids")}
+
+    def where(self, id_) -> list:
+        return self.db.execute("SELECT source, line, kind FROM ids WHERE id = ? ORDER BY source, line", (id_,)).fetchall()
+
+    def duplicates(self) -> dict:
+        """IDs defined more than once -> [(source, line, kind)]."""
+        dupes = {}
+        for id_, source, line, kind in self.db.execute(
+                "SELECT id, source, line, kind FROM ids WHERE id IN "
+                "(SELECT id FROM ids GROUP BY id HAVING COUNT(*) > 1) ORDER BY id, source, line"):
+            dupes.setdefault(id_, []).append((source, line, kind))
+        return dupes
+
+    def unresolved(self, refs) -> set:
+        """The refs that no source defines (one indexed join)."""
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS refs (id TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM refs")
+        self.db.executemany("INSERT OR IGNORE INTO refs VALUES (?)", ((r,) for r in refs))
+        return {r[0] for r in self.db.execute(
+            "SELECT refs.id FROM refs WHERE NOT EXISTS (SELECT 1 FROM ids WHERE ids.id = refs.id)")}
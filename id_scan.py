@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+id_scan.py
+Bulk ID scan of compiled artifacts (id_integrity_check, fingerprint_sync) over id_index.
+
+Each artifact is indexed once by id_index (persisted per content hash), so the IDs a check
+sees and the positions it reports come from the same pass. Trees of many files fan out over
+a process pool; small inputs are scanned in-process, where a pool would only cost startup.
+"""
+import os, re
+from pathlib import Path
+import id_index
+from id_index import ID_BODY, IdIndex
+from manifests import discover_manifests, load_manifest
+
+ID_TOKEN = re.compile(ID_BODY)
+TEXT_SUFFIXES = {".md", ".txt", ".html", ".rst"}
+POOL_MIN_BYTES = 8 << 20
+
+def scan_file(path) -> IdIndex:
+    """id_index entry of one file, without its text (what a pool worker sends back)."""
+    idx = id_index.load(path)
+    return IdIndex(idx.ids, idx.digest)
+
+def ids_of(idx: IdIndex) -> list:
+    """Sorted registry IDs (id_index.ID_BODY) among the bracketed tokens of idx."""
+    return sorted(idx.matching(ID_TOKEN))
+
+def scan_files(paths, jobs: int = 0, fn=scan_file) -> dict:
+    """{path: fn(path)} in the order given; fn defaults to scan_file -> IdIndex.
+
+    fn runs in pool workers, so it must be a module-level function.
+    """
+    paths = list(paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs < 2 or len(paths) < 2 or sum(p.stat().st_size for p in paths) < POOL_MIN_BYTES:
+        return {p: fn(p) for p in paths}
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as ex:
+        return dict(zip(paths, ex.map(fn, paths, chunksize=max(1, len(paths) // (jobs * 4)))))
+
+def artifact_files(base: Path = Path(".")) -> list:
+    """Every compiled artifact: text files under docs/out/ plus each bundle's generated runtime prompt."""
+    found = [base / "Runtime_Prompt.md"]
+    out_dir = base / "docs" / "out"
+    for dirpath, dirnames, filenames in os.walk(out_dir):
+        dirnames.sort()
+        found += [Path(dirpath) / n for n in sorted(filenames) if Path(n).suffix.lower() in TEXT_SUFFIXES]
+    for m in discover_manifests(base):
+        try:
+            found.append(m.parent / load_manifest(m)["paths"]["runtime_prompt"])
+        except (OSError, KeyError, TypeError):
+            continue
+    seen, files = set(), []
+    for p in found:
+        if p.is_file() and p.resolve() not in seen:
+            seen.add(p.resolve())
+            files.append(p)
+    return files
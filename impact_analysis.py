@@ -1,8 +1,25 @@
 #!/usr/bin/env python3
-import subprocess, sys, time
+"""
+impact_analysis.py
+Which artifacts are stale, and what must be rebuilt in which order.
+
+The input -> artifact graph comes from the manifests: each sync manifest (runtime prompt),
+registry.yaml (compiled docs) and doc_manifest.yaml (doc sync report/badge/lock). The
+legacy ARTIFACTS map is used only when none of them exist.
+
+    python impact_analysis.py            # gate: stale artifacts / inputs committed without outputs
+    python impact_analysis.py --plan     # JSON rebuild plan: stale artifacts + dependents, in build order
+
+Directory listings are kept in a stat cache (<cache dir>/impact_stat.json) and reused
+while a directory's mtime is unchanged; files themselves are still stat'ed, since editing a
+file does not touch its directory. Each directory is walked at most once per run.
+"""
+import json, os, subprocess, sys, time
 from pathlib import Path
+from cache_config import cache_enabled, cache_path
 
 BASE = Path(".")
+STAT_CACHE = cache_path("impact_stat.json") if cache_enabled() else None
 
 ARTIFACTS = {
     "Runtime_Prompt.md": [
@@ -21,36 +38,178 @@ ARTIFACTS = {
         "doc_manifest.yaml",
     ]
 }
+# Plan commands name the interpreter "python"; executors substitute their own
+BUILD_DOCS = ["python", "docs/builders/build_docs.py"]
+VALIDATE_DOCS = ["python", "docs/validators/validate_docs.py"]
+
+def rel(p) -> str:
+    return Path(os.path.normpath(p)).as_posix()
+
+def build_graph(base: Path = BASE) -> dict:
+    """artifact -> {"inputs": [paths], "command": argv that rebuilds it}"""
+    graph = {}
+    from manifests import bundle_inputs, discover_manifests, load_manifest
+    for m in discover_manifests(base):
+        try:
+            manifest = load_manifest(m)
+            out = m.parent / manifest["paths"]["runtime_prompt"]
+            inputs = bundle_inputs(m)
+        except (OSError, KeyError, TypeError):
+            continue
+        cmd = ["python", "sync_orchestrator.py"]
+        if rel(m.parent) != rel(base):
+            cmd += ["--all", "--root", rel(m.parent)]
+        graph[rel(out)] = {"inputs": sorted({rel(p) for p in inputs}), "command": cmd}
+    from yaml_cache import load_yaml
+    registry = next((r for r in (base / "docs" / "registry.yaml", base / "registry.yaml") if r.exists()), None)
+    doc_outputs = []
+    if registry is not None:
+        for doc in (load_yaml(registry) or {}).get("documents", []) or []:
+            if not doc.get("output"):
+                continue
+            inputs = [registry] + [base / doc[k] for k in ("template", "golden") if doc.get(k)]
+            inputs += [base / s for s in (doc.get("sources") or {}).values() if s]
+            if (base / "doc_manifest.yaml").exists():
+                inputs.append(base / "doc_manifest.yaml")
+            doc_outputs.append(rel(base / doc["output"]))
+            graph[doc_outputs[-1]] = {"inputs": sorted({rel(p) for p in inputs}), "command": BUILD_DOCS}
+    doc_manifest = base / "doc_manifest.yaml"
+    if doc_manifest.exists():
+        dm = load_yaml(doc_manifest) or {}
+        for key in ("report", "badge", "lock"):
+            if dm.get(key):
+                graph[rel(base / dm[key])] = {"inputs": sorted({rel(doc_manifest), *doc_outputs}), "command": VALIDATE_DOCS}
+    if not graph:
+        graph = {out: {"inputs": inputs, "command": BUILD_DOCS if out.startswith("docs/") else ["python", "sync_orchestrator.py"]}
+                 for out, inputs in ARTIFACTS.items()}
+    return graph
+
+class StatCache:
+    """Newest mtime under a path, reusing directory listings while the directory's mtime holds."""
+    def __init__(self, path: Path = STAT_CACHE):
+        self.path = path  # None: listings live for this run only
+        try:
+            self.dirs = json.loads(path.read_text(encoding="utf-8")) if path is not None else {}
+        except (OSError, ValueError):
+            self.dirs = {}
+        self.memo = {}
+        self.dirty = False
+
+    def listing(self, d: str, st) -> dict:
+        cached = self.dirs.get(d)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["entries"]
+        entries = {}
+        with os.scandir(d) as it:
+            for e in it:
+                entries[e.name] = e.is_dir(follow_symlinks=False)
+        self.dirs[d] = {"mtime_ns": st.st_mtime_ns, "entries": entries}
+        self.dirty = True
+        return entries
 
-def mtime(p: Path) -> float:
-    try:
-        return p.stat().st_mtime
-    except FileNotFoundError:
-        return 0.0
+    def newest(self, p: str) -> int:
+        if p in self.memo:
+            return self.memo[p]
+        try:
+            st = os.stat(p)
+        except OSError:
+            self.memo[p] = 0
+            return 0
+        latest = 0
+        if os.path.isdir(p):
+            for name, is_dir in self.listing(p, st).items():
+                child = os.path.join(p, name)
+                if is_dir:
+                    latest = max(latest, self.newest(child))
+                else:
+                    try:
+                        latest = max(latest, os.stat(child).st_mtime_ns)
+                    except OSError:
+                        pass
+        else:
+            latest = st.st_mtime_ns
+        self.memo[p] = latest
+        return latest
+
+    def save(self):
+        if not self.dirty or self.path is None:
+            return
+        # forget directories that were not visited this run
+        self.dirs = {d: v for d, v in self.dirs.items() if d in self.memo}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self.dirs), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
 
 def newest_under(path: Path) -> float:
-    if path.is_file():
-        return mtime(path)
-    latest = 0.0
-    if path.exists():
-        for pp in path.rglob("*"):
-            if pp.is_file():
-                latest = max(latest, mtime(pp))
-    return latest
-
-def check_mtime():
-    errors = []
-    for out, inputs in ARTIFACTS.items():
-        outp = BASE / out
+    return StatCache(None).newest(str(path)) / 1e9
+
+def stale_artifacts(graph: dict, stats: StatCache, base: Path = BASE) -> dict:
+    """artifact -> reason, for artifacts missing or older than their newest input"""
+    stale = {}
+    for out, node in graph.items():
+        inputs = [str(base / i) for i in node["inputs"]]
+        outp = base / out
         if not outp.exists():
-            if any((BASE / i).exists() for i in inputs):
-                errors.append(f"{out} missing but inputs exist; run build")
+            if any(os.path.exists(i) for i in inputs):
+                stale[out] = "missing"
             continue
-        latest_in = 0.0
-        for i in inputs:
-            ip = BASE / i
-            latest_in = max(latest_in, newest_under(ip))
-        if latest_in and mtime(outp) < latest_in:
+        latest_in = max((stats.newest(i) for i in inputs), default=0)
+        if latest_in and outp.stat().st_mtime_ns < latest_in:
+            stale[out] = "older than inputs"
+    return stale
+
+def dependents(graph: dict) -> dict:
+    """artifact -> artifacts that consume it (an input equal to or under it)"""
+    deps = {a: set() for a in graph}
+    for a, node in graph.items():
+        for b in graph:
+            if a != b and any(i == b or i.startswith(b + "/") for i in node["inputs"]):
+                deps[b].add(a)
+    return deps
+
+def rebuild_plan(graph: dict, stale: dict) -> list:
+    """Stale artifacts and everything downstream, dependencies first."""
+    deps = dependents(graph)
+    need, todo = dict(stale), list(stale)
+    while todo:
+        for d in sorted(deps[todo.pop()]):
+            if d not in need:
+                need[d] = "input rebuilt"
+                todo.append(d)
+    # Kahn's algorithm over the needed subgraph; ties broken by name for a stable plan
+    indeg = {a: sum(1 for b in need if a in deps[b]) for a in need}
+    ready = sorted(a for a, n in indeg.items() if n == 0)
+    order = []
+    while ready:
+        a = ready.pop(0)
+        order.append(a)
+        for d in sorted(deps[a]):
+            if d in indeg:
+                indeg[d] -= 1
+                if indeg[d] == 0:
+                    ready.append(d)
+        ready.sort()
+    order += sorted(a for a in need if a not in order)  # cycles: keep them, in name order
+    steps, seen_cmds = [], set()
+    for a in order:
+        cmd = graph[a]["command"]
+        steps.append({"artifact": a, "reason": need[a], "command": cmd,
+                      "run": tuple(cmd) not in seen_cmds})  # one command may rebuild several artifacts
+        seen_cmds.add(tuple(cmd))
+    return steps
+
+def check_mtime(graph: dict = None, stats: StatCache = None):
+    graph = build_graph() if graph is None else graph
+    stats = StatCache() if stats is None else stats
+    errors = []
+    for out, reason in stale_artifacts(graph, stats).items():
+        if reason == "missing":
+            errors.append(f"{out} missing but inputs exist; run build")
+        else:
             errors.append(f"{out} is older than its inputs; rebuild required")
     return errors
 
@@ -63,27 +222,36 @@ def changed_files():
         lines = [l.strip() for l in res.stdout.splitlines() if l.strip()]
     return set(lines)
 
-def map_impacts(changes):
+def map_impacts(changes, graph: dict = None):
+    graph = build_graph() if graph is None else graph
     impacted = set()
-    for out, inputs in ARTIFACTS.items():
-        for i in inputs:
+    for out, node in graph.items():
+        for i in node["inputs"]:
             for c in changes:
                 if c.startswith(i):
                     impacted.add(out)
     return impacted
 
-def outputs_changed(changes):
-    outs = { "Runtime_Prompt.md", "docs/out/SRS.md" }
+def outputs_changed(changes, graph: dict = None):
+    outs = set(build_graph() if graph is None else graph)
     return outs.intersection(changes)
 
 def main():
+    graph = build_graph()
+    stats = StatCache()
+    if "--plan" in sys.argv[1:]:
+        plan = rebuild_plan(graph, stale_artifacts(graph, stats))
+        stats.save()
+        print(json.dumps({"generated": time.strftime('%Y-%m-%d %H:%M:%S'), "steps": plan}, indent=2))
+        return 0
     errs = []
-    errs += check_mtime()
+    errs += check_mtime(graph, stats)
+    stats.save()
     changes = changed_files()
     if changes:
-        impacted = map_impacts(changes)
-        out_changes = outputs_changed(changes)
-        for art in impacted:
+        impacted = map_impacts(changes, graph)
+        out_changes = outputs_changed(changes, graph)
+        for art in sorted(impacted):
             if art not in out_changes:
                 errs.append(f"Impact analysis: inputs changed but artifact not updated in commit: {art}")
     if errs:
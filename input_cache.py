@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+input_cache.py
+Pass records for orchestrator stages and verifier checks, keyed by their declared inputs.
+
+A stage declares the files it reads (glob patterns, relative to the repo root). Its key is
+a hash over the matched paths and contents plus a tool version; a stage whose key matches
+its last recorded pass can be skipped.
+
+FileHashes is the one implementation of stat-validated file hashing (also used for
+sync_orchestrator's lockfile and validate_prompts): a hash is reused while the file's
+(size, mtime_ns, inode) match and the file is older than the run that hashed it. Like git's
+index, a file modified at or after that run's stat time is "racily clean" and re-hashed.
+
+module_deps lists the repo modules a script imports, so a stage can declare its own code as
+inputs without a hand-kept list.
+
+Store: <cache dir>/passes.json (see cache_config); with caching off nothing is skipped.
+"""
+import glob, hashlib, json, mmap, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from cache_config import cache_enabled, cache_path
+
+CACHE_PATH = cache_path("passes.json")
+HASH_CHUNK = 1 << 20
+MMAP_MIN = 16 << 20
+
+def sha256_file(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_MIN:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        else:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+def stat_key(path) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+class FileHashes:
+    """sha256 per file, reusing the previous run's (hashes, stats, stat_time_ns) where safe."""
+    def __init__(self, hashes: dict = None, stats: dict = None, stat_time_ns: int = 0):
+        self.prev_hashes, self.prev_stats, self.prev_time = hashes or {}, stats or {}, stat_time_ns
+        self.hashes, self.stats = {}, {}
+        self.stat_time_ns = time.time_ns()
+        self.lock = threading.Lock()
+
+    def digest(self, path, key: str = None) -> str:
+        """Hash of path, recorded under key (default str(path))."""
+        k = str(path) if key is None else key
+        sig = stat_key(path)
+        prev = self.prev_hashes.get(k)
+        h = prev if prev and self.prev_stats.get(k) == sig and sig[1] < self.prev_time else sha256_file(path)
+        with self.lock:
+            self.stats[k], self.hashes[k] = sig, h
+        return h
+
+    def digest_many(self, paths) -> list:
+        """Hashes of paths, in order; files that need hashing are read on a thread pool."""
+        paths = list(paths)
+        if len(paths) < 2:
+            return [self.digest(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as ex:
+            return list(ex.map(self.digest, paths))
+
+    def state(self, carry: bool = False) -> dict:
+        """What to persist for the next run. carry also keeps the previous run's entries for files
+        not seen in this one, except racily clean ones (they would be trusted under the new time)."""
+        hashes, stats = {}, {}
+        if carry:
+            for k, h in self.prev_hashes.items():
+                st = self.prev_stats.get(k)
+                if st and st[1] < self.prev_time:
+                    hashes[k], stats[k] = h, st
+        hashes.update(self.hashes)
+        stats.update(self.stats)
+        return {"hashes": hashes, "stats": stats, "stat_time_ns": self.stat_time_ns}
+
+def expand(patterns, base: Path = Path(".")) -> list:
+    """Sorted relative paths of the files matched by patterns ('**' recurses)."""
+    files = set()
+    for pat in patterns:
+        for p in glob.glob(pat, root_dir=base, recursive=True):
+            if (base / p).is_file():
+                files.add(Path(p).as_posix())
+    return sorted(files)
+
+def module_deps(script: str, base: Path = Path(".")) -> list:
+    """script plus every repo module it imports, transitively (top-level and tools/ modules),
+    as sorted paths relative to base. Read from the import statements; nothing is imported."""
+    import ast
+    seen, todo = set(), [script]
+    while todo:
+        rel = todo.pop()
+        if rel in seen or not (base / rel).is_file():
+            continue
+        seen.add(rel)
+        for node in ast.walk(ast.parse((base / rel).read_bytes(), rel)):
+            if isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for n in names:
+                top = n.split(".")[0]
+                todo += [m for m in (f"{top}.py", f"tools/{top}.py") if (base / m).is_file()]
+    return sorted(seen)
+
+class PassCache:
+    def __init__(self, path: Path = CACHE_PATH, base: Path = Path(".")):
+        self.path, self.base = path, base
+        self.enabled = cache_enabled()
+        self.lock = threading.Lock()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self.passes = data.get("passes", {})
+        self.files = FileHashes(data.get("hashes"), data.get("stats"), data.get("stat_time_ns", 0))
+
+    def digest(self, rel: str) -> str:
+        return self.files.digest(self.base / rel, rel)
+
+    def key(self, patterns, version: str = "") -> str:
+        h = hashlib.sha256(version.encode("utf-8"))
+        for rel in expand(patterns, self.base):
+            h.update(f"\0{rel}\0{self.digest(rel)}".encode("utf-8"))
+        return h.hexdigest()
+
+    def last_pass(self, name: str, key: str):
+        """The stored pass record for name if it was made with this key, else None."""
+        rec = self.passes.get(name)
+        return rec if self.enabled and rec and rec.get("key") == key else None
+
+    def record(self, name: str, key: str, **extra):
+        with self.lock:
+            self.passes[name] = {"key": key, "at": time.strftime('%Y-%m-%d %H:%M:%S'), **extra}
+            self.save()
+
+    def forget(self, name: str):
+        with self.lock:
+            if self.passes.pop(name, None) is not None:
+                self.save()
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps({"passes": self.passes, **self.files.state(carry=True)}), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
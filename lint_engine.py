@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+lint_engine.py
+Structural lint for compiled prompts (sync_orchestrator.structural_checks, eval_harness).
+
+All rules are compiled once:
+- banned_phrases             -> one Aho-Corasick automaton over the lowercased text (positions
+                                are mapped back where lowercasing changes the length, e.g. 'İ')
+- regex_rules                -> one compiled pattern per rule ({id, pattern, message, ignore_case}),
+                                so rules may overlap and keep their own inline flags and groups
+- max_chars                  -> whole-prompt length cap
+- max_section_length_chars   -> per-section cap (a section runs from its heading to the next)
+Every hit carries line, column and the ID of the owning section (from "# 1.2. Title  [SEC-ID]"
+headings).
+"""
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from pathlib import Path
+from coverage_engine import Automaton
+from yaml_cache import load_yaml
+
+Hit = namedtuple("Hit", "rule message line col section")
+HEADING = re.compile(r"^#.*\[([^\[\]]+)\]\s*$", re.MULTILINE)
+
+def lower_with_offsets(text: str):
+    """(text.lower(), offset in text of each lowered char), or (lowered, None) when lengths agree."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered, None
+    origin = []
+    for i, ch in enumerate(text):
+        origin += [i] * len(ch.lower())
+    return lowered, origin
+
+class LintEngine:
+    def __init__(self, rules: dict):
+        rules = rules or {}
+        self.max_chars = rules.get("max_chars")
+        self.max_section = rules.get("max_section_length_chars")
+        phrases = {str(b).lower() for b in rules.get("banned_phrases", []) or [] if b}
+        self.banned = Automaton(phrases) if phrases else None
+        self.regex_rules = [(re.compile(r["pattern"], re.MULTILINE | (re.IGNORECASE if r.get("ignore_case") else 0)), r)
+                            for r in rules.get("regex_rules", []) or []]
+
+    @classmethod
+    def from_rules(cls, structural: dict, base: Path = Path(".")):
+        """Manifest `structural` block, merged with the style rules file it points to."""
+        rules = dict(structural or {})
+        style_path = rules.pop("style_rules", None)
+        if style_path and (base / style_path).exists():
+            style = load_yaml(base / style_path) or {}
+            rules["banned_phrases"] = list(rules.get("banned_phrases", []) or []) + list(style.get("banned_phrases", []) or [])
+            rules["regex_rules"] = list(rules.get("regex_rules", []) or []) + list(style.get("regex_rules", []) or [])
+            rules.setdefault("max_section_length_chars", style.get("max_section_length_chars"))
+        return cls(rules)
+
+    def lint(self, text: str) -> dict:
+        newlines = [m.start() for m in re.finditer("\n", text)]
+        heads = [(m.start(), m.group(1)) for m in HEADING.finditer(text)]
+        starts = [h[0] for h in heads]
+
+        def where(pos):
+            line = bisect_right(newlines, pos - 1)
+            col = pos - (newlines[line - 1] + 1 if line else 0)
+            k = bisect_right(starts, pos) - 1
+            return line + 1, col + 1, heads[k][1] if k >= 0 else None
+
+        hits = []
+        if self.banned is not None:
+            lowered, origin = lower_with_offsets(text)
+            for pos, phrase in self.banned.iter_matches(lowered):
+                hits.append(Hit("banned_phrase", f"Banned phrase: {phrase}", *where(origin[pos] if origin else pos)))
+        for rx, r in self.regex_rules:
+            for m in rx.finditer(text):
+                hits.append(Hit(r.get("id", "regex"), r.get("message", f"Matches /{r['pattern']}/"), *where(m.start())))
+        if self.max_section:
+            for k, (start, sid) in enumerate(heads):
+                end = heads[k + 1][0] if k + 1 < len(heads) else len(text)
+                if end - start > self.max_section:
+                    hits.append(Hit("max_section_length", f"Section too long (> {self.max_section} chars): {end - start}", *where(start)))
+        hits.sort(key=lambda h: (h.line, h.col))
+        issues = []
+        if self.max_chars and len(text) > self.max_chars:
+            issues.append(f"Prompt too long (> {self.max_chars} chars): {len(text)}")
+        issues += [f"{h.message} (line {h.line}, col {h.col}, section {h.section or '-'})" for h in hits]
+        return {"len": len(text), "issues": issues, "hits": [h._asdict() for h in hits]}
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+manifests.py
+Prompt bundle manifests: loading, discovery (monorepo mode) and each bundle's input files.
+Shared by sync_orchestrator, sync_daemon, id_scan and impact_analysis.
+"""
+import os
+from pathlib import Path
+from cache_config import MANIFEST_NAMES
+from yaml_cache import load_yaml
+
+SKIP_DIRS = {".git", ".promptops-cache", "node_modules", ".venv", "venv", "__pycache__", ".tox"}
+
+def load_manifest(path: Path) -> dict:
+    return load_yaml(path)
+
+def discover_manifests(root: Path) -> list:
+    """Bundle manifests for monorepo mode.
+
+    A root manifest with a `bundles:` list (manifest files or bundle directories)
+    wins; otherwise the tree is searched for sync manifests.
+    """
+    for name in MANIFEST_NAMES:
+        top = root / name
+        if top.exists():
+            bundles = (load_manifest(top) or {}).get("bundles")
+            if bundles:
+                found = []
+                for b in bundles:
+                    bp = root / b
+                    if bp.is_dir():
+                        bp = next((bp / n for n in MANIFEST_NAMES if (bp / n).exists()), bp / MANIFEST_NAMES[0])
+                    found.append(bp)
+                return found
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in MANIFEST_NAMES:
+            if name in filenames:
+                found.append(Path(dirpath) / name)
+    return found
+
+def bundle_inputs(manifest_path) -> list:
+    """Files a bundle's verdict depends on (what the daemon watches)."""
+    manifest_path = Path(manifest_path)
+    base = manifest_path.parent
+    manifest = load_manifest(manifest_path)
+    paths = manifest["paths"]
+    files = [manifest_path, base / paths["spec"], base / paths["checklist"], base / paths["compiler"]]
+    style_rules = (manifest.get("structural") or {}).get("style_rules")
+    if style_rules:
+        files.append(base / style_rules)
+    return files + [base / p for p in paths.get("patches", []) if p]
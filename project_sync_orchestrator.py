@@ -1,33 +1,151 @@
-
 #!/usr/bin/env python3
-import os, sys, subprocess, json
+"""
+project_sync_orchestrator.py
+End-to-end sync: docs build, prompt sync, docs validation.
+
+Stages form a DAG (STAGES: name, command, dependencies, declared inputs: globs, or callables
+returning the paths a stage reads, e.g. its code from input_cache.module_deps) and run on a
+worker pool as soon as their dependencies pass, so a run takes as long as its critical
+path. Output is streamed live, prefixed with the stage name. The first failure cancels
+everything still pending and terminates running stages (fail-fast). A stage whose inputs
+(including its own outputs) and command line are unchanged since its last pass is skipped;
+skipped stages are listed, with the time of the pass they reuse, at the end of the run.
+
+    python project_sync_orchestrator.py [--jobs N] [--no-cache] [--trace trace.json]
+"""
+import glob, os, sys, subprocess, json, threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
+import tracing
+from input_cache import PassCache, module_deps
+
+def prompt_sync_inputs(base: Path) -> list:
+    """What `sync_orchestrator.py --check` reads: its modules, the bundle's inputs (manifest, spec,
+    checklist, patches, style rules, compiler) with the compiler's modules, and the runtime prompt."""
+    from manifests import bundle_inputs, load_manifest
+    manifest = base / "sync_manifest.yaml"
+    paths = load_manifest(manifest)["paths"]
+    files = [p.relative_to(base).as_posix() for p in bundle_inputs(manifest)]
+    files += module_deps("sync_orchestrator.py", base) + module_deps(paths["compiler"], base)
+    return files + [paths["runtime_prompt"]]
+
+Stage = namedtuple("Stage", "name cmd deps inputs")
+STAGES = [
+    Stage("build_docs", ["python", "docs/builders/build_docs.py"], (),
+          ["docs/builders/**", "docs/sources/**", "docs/templates/**", "docs/goldens/**", "docs/registry.yaml",
+           "registry.yaml", "doc_manifest.yaml", "docs/out/SRS.md"]),
+    Stage("prompt_sync", ["python", "sync_orchestrator.py", "--check"], (),
+          [prompt_sync_inputs]),
+    Stage("validate_docs", ["python", "docs/validators/validate_docs.py"], ("build_docs",),
+          ["docs/validators/**", "docs/out/**", "doc_manifest.yaml", "docs/registry.yaml", "registry.yaml"]),
+]
+_print_lock = threading.Lock()
+
+def emit(name: str, line: str):
+    with _print_lock:
+        print(f"[{name}] {line}", flush=True)
+
+def run(cmd, cwd=".", name=None, procs=None, stop=None):
+    """Run cmd, streaming its merged output line by line; returns the exit code."""
+    cmd = [sys.executable if c == "python" else c for c in cmd]
+    name = name or Path(cmd[1]).stem
+    # Children inherit PROMPTOPS_TRACE, so their own spans land in the same trace
+    with tracing.span(f"stage.{name}", cmd=" ".join(cmd[1:])):
+        with _print_lock:  # fail-fast reads procs under the same lock
+            if stop is not None and stop.is_set():
+                return -1
+            p = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 text=True, bufsize=1, env={**os.environ, "PYTHONUNBUFFERED": "1"})
+            if procs is not None:
+                procs[name] = p
+        for line in p.stdout:
+            emit(name, line.rstrip("\n"))
+        return p.wait()
+
+def active_stages(base: Path) -> list:
+    stages = []
+    for s in STAGES:
+        if s.name == "prompt_sync" and not (base / "sync_orchestrator.py").exists():
+            continue  # prompt sync only where PromptOps is installed
+        stages.append(s._replace(deps=tuple(d for d in s.deps if any(t.name == d for t in STAGES))))
+    return stages
+
+def stage_inputs(s: Stage, base: Path):
+    """Input patterns of s with callables expanded; None when they cannot be listed (the stage then always runs)."""
+    pats = []
+    try:
+        for i in s.inputs:
+            pats += [glob.escape(p) for p in i(base)] if callable(i) else [i]
+    except Exception:
+        return None
+    return pats
+
+def stage_key(cache: PassCache, s: Stage):
+    # the command line stands in for the tool version; the tool's sources are among its inputs
+    pats = stage_inputs(s, cache.base)
+    return None if pats is None else cache.key(pats, " ".join(s.cmd))
 
-def run(cmd, cwd="."):
-    p = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
-    return p.returncode, p.stdout, p.stderr
+def run_stages(stages, base: Path, jobs: int, cache: PassCache) -> int:
+    """Run the DAG; returns 0 or the exit code of the first failed stage."""
+    done, procs, failed, stop, skipped = set(), {}, [], threading.Event(), {}
+    pending = {s.name: s for s in stages}
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        while (pending or running) and not failed:
+            for name, s in list(pending.items()):
+                if not all(d in done for d in s.deps):
+                    continue
+                del pending[name]
+                rec = cache.last_pass(name, stage_key(cache, s))
+                if rec is not None:
+                    emit(name, f"SKIP (inputs unchanged since pass at {rec['at']})")
+                    done.add(name)
+                    skipped[name] = rec["at"]
+                    continue
+                running[ex.submit(run, s.cmd, base.as_posix(), name, procs, stop)] = s
+            if not running:
+                if pending:  # unsatisfiable dependencies
+                    failed.append((sorted(pending)[0], 1))
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                s = running.pop(fut)
+                rc = fut.result()
+                if rc == 0:
+                    done.add(s.name)
+                    key = stage_key(cache, s)  # after the run: outputs are inputs too
+                    if key is not None:
+                        cache.record(s.name, key)
+                    else:
+                        cache.forget(s.name)
+                else:
+                    cache.forget(s.name)
+                    emit(s.name, f"FAILED (exit {rc})")
+                    failed.append((s.name, rc))
+        if failed:
+            # fail fast: nothing new starts, running stages are stopped
+            with _print_lock:
+                stop.set()
+                victims = [(s, procs.get(s.name)) for fut, s in running.items() if not fut.cancel()]
+            for s, p in victims:
+                if p is not None and p.poll() is None:
+                    emit(s.name, "terminated (fail-fast)")
+                    p.terminate()
+    if skipped:
+        print("Skipped (inputs and tool version unchanged): " + ", ".join(f"{n} (pass at {at})" for n, at in skipped.items()))
+    return failed[0][1] if failed else 0
 
 def main(args):
+    tracing.init("project_sync_orchestrator", args[args.index("--trace") + 1] if "--trace" in args[:-1] else None)
     base = Path(".")
-    # Build docs
-    rc, out, err = run([sys.executable, "docs/builders/build_docs.py"], cwd=base.as_posix())
-    print(out.strip())
+    jobs = int(args[args.index("--jobs") + 1]) if "--jobs" in args[:-1] else len(STAGES)
+    cache = PassCache(base=base)
+    if "--no-cache" in args:
+        cache.enabled = False
+    rc = run_stages(active_stages(base), base, jobs, cache)
     if rc != 0:
-        print(err)
         sys.exit(rc)
-    # Run prompt sync if present
-    if (base / "sync_orchestrator.py").exists():
-        rc2, out2, err2 = run([sys.executable, "sync_orchestrator.py", "--check"], cwd=base.as_posix())
-        print(out2.strip())
-        if rc2 != 0:
-            print(err2)
-            sys.exit(rc2)
-    # Validate docs
-    rc3, out3, err3 = run([sys.executable, "docs/validators/validate_docs.py"], cwd=base.as_posix())
-    print(out3.strip())
-    if rc3 != 0:
-        print(err3)
-        sys.exit(rc3)
     print("Project sync complete.")
     sys.exit(0)
 
@@ -1,17 +1,16 @@
 #!/usr/bin/env python3
-import re, sys, yaml, pandas as pd
+import csv, sys
+import id_index
+from coverage_engine import as_index, build_index
+from yaml_cache import load_yaml
 
 def load_text(path):
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-def load_yaml(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
-
 def search_token(text, token):
-    import re
-    return re.search(re.escape(token), text) is not None
+    # text may be a raw string or a coverage_engine.TokenIndex; both answer substring membership
+    return token in text
 
 def collect_ids_and_refs(checklist: dict):
     invariants = [item.get("id") for item in checklist.get("invariants", []) if item.get("id")]
@@ -25,7 +24,20 @@ def collect_ids_and_refs(checklist: dict):
         })
     return invariants, techniques, outputs, tests
 
+def write_table(f, rows):
+    """One CSV block laid out like DataFrame(rows).to_csv(index=False): columns in
+    first-seen order, missing cells empty, values as str() (lists as their repr)."""
+    columns = list(dict.fromkeys(k for r in rows for k in r))
+    if not columns:
+        f.write("\n")
+        return
+    w = csv.writer(f, lineterminator="\n")
+    w.writerow(columns)
+    for r in rows:
+        w.writerow(["" if r.get(c) is None else r[c] for c in columns])
+
 def coverage_for_category(text, category_name, ids):
+    text = as_index(text)
     present, missing = [], []
     for _id in ids:
         token = f"[{_id}]"
@@ -36,6 +48,7 @@ def coverage_for_category(text, category_name, ids):
     return {"category": category_name, "total": total, "present": covered, "coverage": ratio, "missing": missing, "present_ids": present}
 
 def tests_coverage(text, tests):
+    text = as_index(text, [ref for t in tests for ref in t.get("must_reference", [])])
     results = []
     for t in tests:
         tid = t.get("id")
@@ -49,8 +62,10 @@ def tests_coverage(text, tests):
     return results, {"category": "tests", "total": total, "present": passes, "coverage": ratio, "missing": [r["test_id"] for r in results if not r["passed"]]}
 
 def main(spec_path, checklist_path, out_csv_path):
-    text = load_text(spec_path)
     checklist = load_yaml(checklist_path)
+    # One pass over the spec: the positional index also answers the coverage lookups
+    positions = id_index.load(spec_path)
+    text = build_index(positions, checklist)
     invariants, techniques, outputs, tests = collect_ids_and_refs(checklist)
 
     inv_cov = coverage_for_category(text, "invariants", invariants)
@@ -62,21 +77,17 @@ def main(spec_path, checklist_path, out_csv_path):
     for cat, ids in [("invariants", invariants), ("techniques", techniques), ("outputs", outputs)]:
         for _id in ids:
             token = f"[{_id}]"
-            per_item_rows.append({"category": cat, "id": _id, "found": search_token(text, token)})
+            per_item_rows.append({"category": cat, "id": _id, "found": search_token(text, token), "where": positions.describe(_id)})
     for tr in test_detail:
-        per_item_rows.append({"category": "tests", "id": tr["test_id"], "found": tr["passed"]})
-
-    summary_df = pd.DataFrame([inv_cov, tec_cov, out_cov, test_cov])
-    per_item_df = pd.DataFrame(per_item_rows)
-    tests_df = pd.DataFrame(test_detail)
+        per_item_rows.append({"category": "tests", "id": tr["test_id"], "found": tr["passed"], "where": ""})
 
-    with open(out_csv_path, "w", encoding="utf-8") as f:
+    with open(out_csv_path, "w", encoding="utf-8", newline="") as f:
         f.write("# Summary\n")
-        summary_df.to_csv(f, index=False)
+        write_table(f, [inv_cov, tec_cov, out_cov, test_cov])
         f.write("\n# Per-Item\n")
-        per_item_df.to_csv(f, index=False)
+        write_table(f, per_item_rows)
         f.write("\n# Tests\n")
-        tests_df.to_csv(f, index=False)
+        write_table(f, test_detail)
 
 if __name__ == "__main__":
     if len(sys.argv) != 4:
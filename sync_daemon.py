@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+sync_daemon.py
+Resident sync_orchestrator: keeps bundle results warm and answers hooks over a Unix socket.
+
+    python sync_orchestrator.py --daemon [--all ...]     # start (foreground)
+    python sync_orchestrator.py --check                  # asks the daemon, else runs one-shot
+
+Inputs (manifest, spec, checklist, patches, compiler) are watched with inotify when
+available and by stat polling otherwise; only bundles whose inputs changed are re-run.
+Before answering a query the daemon re-stats its inputs, so a verdict is never older
+than the files on disk. Protocol: one JSON request line, one JSON reply line.
+"""
+import ctypes, ctypes.util, json, os, selectors, signal, socket, struct, sys
+from pathlib import Path
+from cache_config import cache_path
+
+SOCKET_PATH = cache_path("syncd.sock")
+POLL_INTERVAL = 0.5
+
+def stat_sig(p: Path):
+    try:
+        st = p.stat()
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+    except OSError:
+        return None
+
+class PollWatcher:
+    """Portable fallback: compare stat signatures on every tick."""
+    fd = None
+
+    def __init__(self, paths):
+        self.sigs = {}
+        self.watch(paths)
+
+    def watch(self, paths):
+        """Watch exactly paths from now on; paths already watched keep their last signature."""
+        self.sigs = {p: self.sigs[p] if p in self.sigs else stat_sig(p) for p in paths}
+
+    def changed(self) -> set:
+        out = set()
+        for p, old in self.sigs.items():
+            new = stat_sig(p)
+            if new != old:
+                self.sigs[p] = new
+                out.add(p)
+        return out
+
+class InotifyWatcher(PollWatcher):
+    """Linux inotify on the parent directories (editors often replace files atomically)."""
+    MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # MODIFY ATTRIB CLOSE_WRITE MOVED_FROM/TO CREATE DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, paths):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        super().__init__(paths)
+
+    def watch(self, paths):
+        super().watch(paths)
+        wanted = {p.resolve().parent for p in paths}
+        for wd, d in list(self.dirs.items()):
+            if d not in wanted:
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.dirs[wd]
+        for d in wanted - set(self.dirs.values()):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d), self.MASK)
+            if wd >= 0:
+                self.dirs[wd] = d
+        self.by_name = {}
+        for p in paths:
+            self.by_name.setdefault((p.resolve().parent, p.name), set()).add(p)
+
+    def changed(self) -> set:
+        out = set()
+        try:
+            buf = os.read(self.fd, 65536)
+        except BlockingIOError:
+            buf = b""
+        pos = 0
+        while pos + self.EVENT.size <= len(buf):
+            wd, _mask, _cookie, length = self.EVENT.unpack_from(buf, pos)
+            name = buf[pos + self.EVENT.size:pos + self.EVENT.size + length].rstrip(b"\0")
+            pos += self.EVENT.size + length
+            d = self.dirs.get(wd)
+            if d is not None:
+                out |= self.by_name.get((d, os.fsdecode(name)), set())
+        # inotify only says "something happened"; stat tells us whether it matters
+        stale = set()
+        for p in out:
+            sig = stat_sig(p)
+            if sig != self.sigs.get(p):
+                self.sigs[p] = sig
+                stale.add(p)
+        return stale
+
+def make_watcher(paths):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher(paths)
+
+class SyncDaemon:
+    def __init__(self, manifests, run_bundle, bundle_inputs):
+        self.run_bundle, self.bundle_inputs = run_bundle, bundle_inputs
+        # Bundles run with the paths as given so lockfile keys match one-shot runs;
+        # queries are matched on resolved paths
+        self.given = {Path(m).resolve(): Path(m) for m in manifests}
+        self.manifests = list(self.given)
+        self.inputs = {m: self.read_inputs(m) for m in self.manifests}
+        self.watcher = make_watcher(self.index_owners())
+        self.results = {}
+        for m in self.manifests:
+            self.rebuild(m)
+
+    def read_inputs(self, manifest) -> list:
+        # a manifest that does not load yet still has itself watched, so fixing it is noticed
+        try:
+            files = self.bundle_inputs(self.given[manifest])
+        except Exception:
+            files = []
+        return sorted({manifest, *(Path(p).resolve() for p in files)})
+
+    def index_owners(self) -> list:
+        self.owners = {}
+        for m, files in self.inputs.items():
+            for f in files:
+                self.owners.setdefault(f, set()).add(m)
+        return list(self.owners)
+
+    def rebuild(self, manifest):
+        self.results[manifest] = self.run_bundle(self.given[manifest])
+
+    def refresh(self, changed=None):
+        changed = self.watcher.changed() if changed is None else changed
+        # an edited manifest may name different inputs: re-read them and re-watch
+        edited = [m for m in self.manifests if m in changed]
+        if edited:
+            for m in edited:
+                self.inputs[m] = self.read_inputs(m)
+            self.watcher.watch(self.index_owners())
+        for m in sorted({m for p in changed for m in self.owners.get(p, ())} | set(edited)):
+            print(f"[syncd] inputs changed; re-running {m}")
+            self.rebuild(m)
+
+    def verify(self):
+        # Cheap stat sweep before every verdict, independent of event delivery latency
+        stale = {p for p in self.owners if stat_sig(p) != self.watcher.sigs.get(p)}
+        for p in stale:
+            self.watcher.sigs[p] = stat_sig(p)
+        self.refresh(stale)
+
+    def handle(self, req: dict) -> dict:
+        cmd = req.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "check":
+            wanted = [Path(m).resolve() for m in req.get("manifests", [])] or self.manifests
+            if any(m not in self.results for m in wanted):
+                return {"error": "bundle not watched by this daemon"}
+            self.verify()
+            results = [self.results[m] for m in wanted]
+            return {"ok": all(r["ok"] for r in results), "results": results}
+        return {"error": f"unknown command {cmd!r}"}
+
+    def serve(self, sock_path: Path = SOCKET_PATH):
+        sock_path.parent.mkdir(parents=True, exist_ok=True)
+        if query({"cmd": "ping"}, sock_path) is not None:
+            print(f"[syncd] already running on {sock_path.as_posix()}")
+            return 1
+        if sock_path.exists():
+            sock_path.unlink()
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        srv.bind(str(sock_path))
+        srv.listen(16)
+        sel = selectors.DefaultSelector()
+        sel.register(srv, selectors.EVENT_READ, "client")
+        if self.watcher.fd is not None:
+            sel.register(self.watcher.fd, selectors.EVENT_READ, "fs")
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        print(f"[syncd] watching {len(self.owners)} inputs for {len(self.manifests)} bundle(s) "
+              f"({type(self.watcher).__name__}); socket {sock_path.as_posix()}")
+        try:
+            while True:
+                events = sel.select(timeout=None if self.watcher.fd is not None else POLL_INTERVAL)
+                if not events or any(key.data == "fs" for key, _ in events):
+                    self.refresh()
+                for key, _ in events:
+                    if key.data == "client" and self.serve_one(srv):
+                        return 0
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            srv.close()
+            try:
+                sock_path.unlink()
+            except OSError:
+                pass
+
+    def serve_one(self, srv) -> bool:
+        conn, _ = srv.accept()
+        with conn:
+            conn.settimeout(5)
+            try:
+                req = json.loads(conn.makefile("r", encoding="utf-8").readline() or "{}")
+            except (ValueError, OSError):
+                return False
+            if req.get("cmd") == "stop":
+                conn.sendall(b'{"ok": true}\n')
+                return True
+            try:
+                reply = self.handle(req)
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            conn.sendall((json.dumps(reply) + "\n").encode("utf-8"))
+        return False
+
+def query(req: dict, sock_path: Path = SOCKET_PATH, timeout: float = 30.0):
+    """Send one request to a running daemon; None when no daemon answers."""
+    if not hasattr(socket, "AF_UNIX") or not sock_path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(str(sock_path))
+            s.sendall((json.dumps(req) + "\n").encode("utf-8"))
+            line = s.makefile("r", encoding="utf-8").readline()
+    except OSError:
+        return None
+    try:
+        reply = json.loads(line)
+    except ValueError:
+        return None
+    return None if "error" in reply else reply
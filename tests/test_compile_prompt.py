@@ -0,0 +1,34 @@
+from compile_prompt import RenderCache, SpecTree, apply_patches, iter_md, render_md
+
+def chain(depth):
+    root = node = {"id": "SEC-000", "title": "Level 0", "content": "body"}
+    for i in range(1, depth):
+        child = {"id": f"SEC-{i:03d}", "title": f"Level {i}", "content": "body"}
+        node["children"] = [child]
+        node = child
+    return SpecTree({"sections": [root]})
+
+def test_render_deep_tree():
+    spec = chain(3000)
+    md = render_md(spec.roots, cache=RenderCache())
+    assert md == "".join(iter_md(spec.roots))
+    assert md.count("\n# ") == 2999
+
+def test_render_cache_misses_only_on_edited_path():
+    spec = chain(50)
+    cache = RenderCache()
+    render_md(spec.roots, cache=cache)
+    spec.index["SEC-040"].set("content", "edited")
+    cache.hits = cache.misses = 0
+    md = render_md(spec.roots, cache=cache)
+    assert "edited" in md and md == "".join(iter_md(spec.roots))
+    assert (cache.misses, cache.hits) == (41, 9)
+
+def test_apply_patches_accepts_dict_and_tree():
+    data = {"meta": {}, "sections": [{"id": "SEC-001", "title": "Intro", "content": "a"}]}
+    patches = [{"target_id": "SEC-001", "op": "append", "value": "b"},
+               {"target_id": "SEC-001", "op": "insert-after", "value": {"id": "SEC-002", "title": "Next"}}]
+    tree = apply_patches(SpecTree(data), patches)
+    assert apply_patches(data, patches) is data
+    assert data["sections"][0]["content"] == "ab" and data["sections"][1]["id"] == "SEC-002"
+    assert render_md(data["sections"]) == render_md(tree.roots)
@@ -0,0 +1,34 @@
+import random, re
+import id_index
+from conftest import ROOT
+from coverage_engine import Automaton, TokenIndex, build_index
+import prompt_coverage_checker as pcc
+from yaml_cache import load_yaml
+
+def substring(tok, text):
+    return re.search(re.escape(tok), text) is not None
+
+def test_matches_re_search_on_random_text():
+    rnd = random.Random(1)
+    alphabet = "ab[]-\n"
+    for _ in range(200):
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randrange(40)))
+        tokens = {"".join(rnd.choice(alphabet) for _ in range(rnd.randrange(1, 6))) for _ in range(8)}
+        assert Automaton(tokens).find_all(text) == {t for t in tokens if substring(t, text)}
+        for index in (TokenIndex(text, tokens), TokenIndex(id_index.IdIndex(id_index.build(text), "", text), tokens)):
+            for tok in tokens | {"[a]", "[]", "ab"}:
+                assert (tok in index) == substring(tok, text), (tok, text)
+
+def test_sample_checklist_results_match_plain_search(tmp_path):
+    checklist = load_yaml(ROOT / "Prompt_Checklist_v1.0 (1).yaml")
+    checklist["tests"][0]["must_reference"] = list(checklist["tests"][0]["must_reference"]) + ["Dual-Agent", "no-such-phrase"]
+    spec = tmp_path / "Runtime_Prompt.md"
+    spec.write_text((ROOT / "Runtime_Prompt.md").read_text(encoding="utf-8"), encoding="utf-8")
+    text = spec.read_text(encoding="utf-8")
+    invariants, techniques, outputs, tests = pcc.collect_ids_and_refs(checklist)
+    for indexed in (build_index(text, checklist), build_index(id_index.load(spec), checklist)):
+        for name, ids in (("invariants", invariants), ("techniques", techniques), ("outputs", outputs)):
+            assert pcc.coverage_for_category(indexed, name, ids) == pcc.coverage_for_category(text, name, ids)
+        assert pcc.tests_coverage(indexed, tests) == pcc.tests_coverage(text, tests)
+    detail, _ = pcc.tests_coverage(text, tests)
+    assert detail[0]["missing"] == ["no-such-phrase"]
@@ -0,0 +1,40 @@
+import json
+import pytest
+import fingerprint_sync
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PROMPTOPS_CACHE", "0")
+    (tmp_path / "docs" / "out").mkdir(parents=True)
+    return tmp_path / "docs" / "out" / "SRS.md"
+
+def run(capsys):
+    try:
+        rc = fingerprint_sync.main()
+    except SystemExit as e:
+        rc = e.code
+    return rc, capsys.readouterr().out
+
+def test_moved_and_renamed_sections(workspace, capsys):
+    workspace.write_text("# A [SEC-001]\n[REQ-001]\n## B [SEC-002]\n[REQ-002]\n# Notes\n[REQ-003]\n")
+    assert run(capsys)[0] == 0
+    # SEC-002 moves to the top level and "Notes" is renamed: every ID is still there
+    workspace.write_text("# A [SEC-001]\n[REQ-001]\n# B [SEC-002]\n[REQ-002]\n# Remarks\n[REQ-003]\n")
+    assert run(capsys) == (0, "Sync fingerprint OK.\n")
+    # an ID dropped from a moved section is reported with where it was last seen
+    workspace.write_text("# A [SEC-001]\n[REQ-001]\n## Remarks\n[REQ-003]\n# B [SEC-002]\ntext\n")
+    rc, out = run(capsys)
+    assert rc == 1 and "REQ-002 (in SEC-002)" in out
+
+def test_deep_outline(workspace, capsys):
+    depth = 1500
+    lines = [f"{'#' * (i + 1)} Level {i} [SEC-{i:04d}]\n[REQ-{i:04d}]\n" for i in range(depth)]
+    workspace.write_text("".join(lines))
+    assert run(capsys)[0] == 0
+    stored = json.loads((workspace.parents[2] / "sync_fingerprint.json").read_text())
+    assert len(stored["srs"]["sections"]) == depth + 1
+    del lines[1000]
+    workspace.write_text("".join(lines))
+    rc, out = run(capsys)
+    assert rc == 1 and "REQ-1000 (in SEC-0000 > " in out
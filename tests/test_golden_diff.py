@@ -0,0 +1,55 @@
+import random, time
+from golden_diff import missing_diff, myers, outline_diff
+
+def lcs(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev = 0
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], prev + 1 if x == y else max(row[j], row[j - 1])
+    return row[-1]
+
+def apply(ops, a, b):
+    out = []
+    for op, i, j in ops:
+        if op == "=":
+            assert a[i] == b[j]
+            out.append(a[i])
+        elif op == "+":
+            out.append(b[j])
+    return out
+
+def test_myers_is_a_shortest_edit_script():
+    rnd = random.Random(7)
+    for _ in range(300):
+        a = [rnd.choice("abcd") for _ in range(rnd.randrange(12))]
+        b = [rnd.choice("abcd") for _ in range(rnd.randrange(12))]
+        ops = myers(a, b)
+        assert apply(ops, a, b) == b
+        assert [a[i] for op, i, _ in ops if op != "+"] == a
+        assert sum(op != "=" for op, _, _ in ops) == len(a) + len(b) - 2 * lcs(a, b)
+
+def test_myers_gives_up_past_max_d():
+    assert myers(list("abc"), list("xyz"), 5) is None
+    assert myers(list("abc"), list("xyz"), 6) is not None
+
+def outline(names):
+    return [(n, f"# {h}") for n, h in enumerate(names, 1)]
+
+def test_outline_diff_reports_moves_inserts_and_removals():
+    golden = outline(["A", "B", "C", "D"])
+    compiled = outline(["A", "C", "B", "E"])
+    assert outline_diff(golden, compiled) == [
+        "  ~ moved:    # B  (golden line 2 -> compiled line 3)",
+        "  - removed:  # D  (golden line 4)",
+        "  + inserted: # E  (compiled line 4)"]
+
+def test_renumbered_outline_stays_fast():
+    # Inserting a section near the top renumbers every later heading: nothing matches
+    golden = outline([f"{i}. Title {i}" for i in range(1, 3001)])
+    compiled = outline([f"{i + 1}. Title {i}" for i in range(1, 3001)])
+    t0 = time.perf_counter()
+    lines = outline_diff(golden, compiled)
+    assert time.perf_counter() - t0 < 2
+    assert lines[0].startswith("  (more than") and len(lines) == 1 + 2 * 3000
+    assert lines == missing_diff(golden, compiled)
@@ -0,0 +1,27 @@
+from lint_engine import LintEngine
+
+TEXT = "# 1. Intro  [SEC-001]\nTODO: fix this todo\n"
+
+def rules_of(report):
+    return [(h["rule"], h["line"], h["col"]) for h in report["hits"]]
+
+def test_overlapping_regex_rules_all_hit():
+    eng = LintEngine({"regex_rules": [{"id": "todo", "pattern": "TODO"},
+                                      {"id": "todo_colon", "pattern": "TODO:"}]})
+    assert rules_of(eng.lint(TEXT)) == [("todo", 2, 1), ("todo_colon", 2, 1)]
+
+def test_inline_flags_and_backrefs():
+    eng = LintEngine({"regex_rules": [{"id": "todo", "pattern": "(?i)todo", "ignore_case": True},
+                                      {"id": "repeat", "pattern": r"\b(\w+) \1\b"}]})
+    report = eng.lint(TEXT + "the the end\n")
+    assert rules_of(report) == [("todo", 2, 1), ("todo", 2, 16), ("repeat", 3, 1)]
+    assert all(h["section"] == "SEC-001" for h in report["hits"])
+
+def test_banned_phrases_overlap():
+    eng = LintEngine({"banned_phrases": ["fix this", "this todo"]})
+    assert [h["message"] for h in eng.lint(TEXT)["hits"]] == ["Banned phrase: fix this", "Banned phrase: this todo"]
+
+def test_banned_phrase_position_after_length_changing_lowercase():
+    eng = LintEngine({"banned_phrases": ["Maybe"]})
+    hit, = eng.lint(TEXT + "İİİİ maybe\n")["hits"]
+    assert (hit["line"], hit["col"]) == (3, 6)
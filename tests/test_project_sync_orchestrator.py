@@ -0,0 +1,50 @@
+import shutil, time
+from conftest import ROOT
+from input_cache import PassCache
+from project_sync_orchestrator import Stage, prompt_sync_inputs, run_stages
+
+def py(code):
+    return ["python", "-c", code]
+
+def test_dependencies_run_first(tmp_path, capsys):
+    stages = [Stage("b", py("import pathlib; assert pathlib.Path('a.out').exists()"), ("a",), []),
+              Stage("a", py("import time, pathlib; time.sleep(0.2); pathlib.Path('a.out').write_text('x')"), (), [])]
+    cache = PassCache(tmp_path / "passes.json", base=tmp_path)
+    assert run_stages(stages, tmp_path, 2, cache) == 0
+
+def test_fail_fast_stops_running_and_pending_stages(tmp_path, capsys):
+    stages = [Stage("slow", py("import time; time.sleep(30)"), (), []),
+              Stage("bad", py("import sys, time; time.sleep(0.2); sys.exit(3)"), (), []),
+              Stage("after", py("open('after.out', 'w')"), ("bad",), [])]
+    cache = PassCache(tmp_path / "passes.json", base=tmp_path)
+    t0 = time.monotonic()
+    assert run_stages(stages, tmp_path, 3, cache) == 3
+    assert time.monotonic() - t0 < 10
+    out = capsys.readouterr().out
+    assert "[bad] FAILED (exit 3)" in out and "[slow] terminated (fail-fast)" in out
+    assert not (tmp_path / "after.out").exists()
+
+def test_unchanged_inputs_skip(tmp_path, capsys, monkeypatch):
+    monkeypatch.delenv("PROMPTOPS_CACHE", raising=False)
+    (tmp_path / "in.txt").write_text("1")
+    stages = [Stage("count", py("open('runs', 'a').write('x')"), (), ["in.txt", lambda base: ["extra.txt"]])]
+
+    def run():
+        return run_stages(stages, tmp_path, 1, PassCache(tmp_path / "passes.json", base=tmp_path))
+    assert run() == 0 and run() == 0
+    assert (tmp_path / "runs").read_text() == "x"
+    assert "[count] SKIP" in capsys.readouterr().out
+    (tmp_path / "extra.txt").write_text("new input")
+    assert run() == 0
+    assert (tmp_path / "runs").read_text() == "xx"
+
+def test_prompt_sync_inputs_follow_imports_and_manifest(tmp_path):
+    for name in ("sync_orchestrator.py", "compile_prompt.py", "coverage_engine.py", "id_index.py", "manifests.py",
+                 "cache_config.py", "yaml_cache.py", "tracing.py"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    (tmp_path / "sync_manifest.yaml").write_text(
+        "paths:\n  spec: spec.yaml\n  checklist: checklist.yaml\n  compiler: compile_prompt.py\n"
+        "  runtime_prompt: out.md\n  patches: [p1.yaml, p2.yaml]\n", encoding="utf-8")
+    files = set(prompt_sync_inputs(tmp_path))
+    # id_index comes in through coverage_engine
+    assert {"id_index.py", "manifests.py", "yaml_cache.py", "p1.yaml", "p2.yaml", "spec.yaml", "out.md"} <= files
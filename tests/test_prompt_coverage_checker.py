@@ -0,0 +1,17 @@
+import csv
+import prompt_coverage_checker
+
+def test_free_text_reference_over_artifact_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMPTOPS_CACHE", "0")
+    spec = tmp_path / "Runtime_Prompt.md"
+    spec.write_text("# 1. Roles  [SEC-001]\nA dual-agent loop covers [INV-001].\n", encoding="utf-8")
+    checklist = tmp_path / "checklist.yaml"
+    checklist.write_text("invariants:\n  - id: INV-001\n  - id: INV-002\n"
+                         "tests:\n  - id: TST-001\n    must_reference: ['dual-agent', '[INV-001]']\n"
+                         "  - id: TST-002\n    must_reference: ['single-agent']\n", encoding="utf-8")
+    out = tmp_path / "report.csv"
+    prompt_coverage_checker.main(spec, checklist, out)
+    rows = list(csv.reader(out.read_text(encoding="utf-8").split("# Tests\n")[1].splitlines()))
+    assert [(r[0], r[3]) for r in rows[1:]] == [("TST-001", "True"), ("TST-002", "False")]
+    per_item = out.read_text(encoding="utf-8")
+    assert "invariants,INV-001,True,L2:C26 (SEC-001)" in per_item and "invariants,INV-002,False," in per_item
@@ -0,0 +1,31 @@
+from manifests import bundle_inputs
+from sync_daemon import SyncDaemon
+
+def write_manifest(path, spec):
+    path.write_text(f"paths:\n  spec: {spec}\n  checklist: checklist.yaml\n  compiler: compile_prompt.py\n")
+
+def test_manifest_edit_rewatches_inputs(tmp_path):
+    for name in ("a.yaml", "b.yaml", "checklist.yaml", "compile_prompt.py"):
+        (tmp_path / name).write_text("x\n")
+    manifest = tmp_path / "sync_manifest.yaml"
+    write_manifest(manifest, "a.yaml")
+    runs = []
+    d = SyncDaemon([manifest], lambda m: runs.append(m) or {"ok": True}, bundle_inputs)
+    assert (tmp_path / "a.yaml").resolve() in d.owners and len(runs) == 1
+
+    write_manifest(manifest, "b.yaml")
+    d.verify()
+    assert len(runs) == 2
+    assert (tmp_path / "b.yaml").resolve() in d.owners and (tmp_path / "a.yaml").resolve() not in d.owners
+    assert (tmp_path / "b.yaml").resolve() in d.watcher.sigs
+
+    (tmp_path / "a.yaml").write_text("no longer an input\n")
+    d.verify()
+    assert len(runs) == 2
+    (tmp_path / "b.yaml").write_text("changed spec\n")
+    d.verify()
+    assert len(runs) == 3
+    # the watcher itself (inotify on Linux) now reports the new input as well
+    (tmp_path / "b.yaml").write_text("changed spec again\n")
+    d.refresh()
+    assert len(runs) == 4
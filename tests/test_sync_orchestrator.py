@@ -0,0 +1,28 @@
+import shutil
+from conftest import ROOT
+import sync_orchestrator
+
+def bundle(tmp_path):
+    for name in ("sync_manifest.yaml", "PromptSpec.yaml", "PromptPatches_example.yaml", "compile_prompt.py",
+                 "style_rules.yaml"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    shutil.copy(ROOT / "Prompt_Checklist_v1.0 (1).yaml", tmp_path / "Prompt_Checklist_v1.0.yaml")
+    return tmp_path / "sync_manifest.yaml"
+
+def test_hand_edited_runtime_is_rebuilt_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMPTOPS_CACHE_DIR", str(tmp_path / "cache"))
+    manifest = bundle(tmp_path)
+    runtime = tmp_path / "Runtime_Prompt.md"
+    sync_orchestrator.run_bundle(manifest)
+    built = runtime.read_text(encoding="utf-8")
+
+    runtime.write_text(built + "HAND EDIT\n", encoding="utf-8")
+    shutil.rmtree(tmp_path / "cache")  # a cache miss must recompile, not store what is on disk
+    assert not sync_orchestrator.run_bundle(manifest)["cached"]
+    assert runtime.read_text(encoding="utf-8") == built
+
+    runtime.write_text(built + "HAND EDIT\n", encoding="utf-8")
+    with open(tmp_path / "compile_prompt.py", "a", encoding="utf-8") as f:
+        f.write("\n# compiler change\n")  # new key: recompiled even though the spec is unchanged
+    assert not sync_orchestrator.run_bundle(manifest)["cached"]
+    assert runtime.read_text(encoding="utf-8") == built
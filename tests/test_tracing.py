@@ -0,0 +1,14 @@
+import tracing
+
+def test_events_held_only_while_marked(tmp_path, monkeypatch):
+    monkeypatch.setenv(tracing.ENV, str(tmp_path / "trace.json"))
+    with tracing.span("before"):
+        pass
+    assert tracing._events == []
+    m = tracing.mark()
+    with tracing.span("stage", bytes=3):
+        pass
+    events = tracing.drain(m)
+    assert [e["name"] for e in events] == ["stage"]
+    assert "| stage | 1 |" in tracing.summary_markdown(events)
+    assert tracing._events == [] and tracing.drain(m) == []
@@ -0,0 +1,31 @@
+import os, shutil
+from conftest import ROOT
+import id_scan
+from agents.verifier_agent import CHECKS, Verifier, module_deps
+
+def test_inprocess_check_over_pool_threshold(tmp_path, monkeypatch):
+    # fingerprint_sync hands fingerprint_file to id_scan's process pool once the inputs pass
+    # POOL_MIN_BYTES; the in-process runner must keep the check importable by name for that
+    (tmp_path / "tools").mkdir()
+    shutil.copy(ROOT / "fingerprint_sync.py", tmp_path / "tools" / "fingerprint_sync.py")
+    out = tmp_path / "docs" / "out"
+    out.mkdir(parents=True)
+    line = "Body text for [REQ-001] and [TST-002].\n"
+    for name in ("a.md", "b.md"):
+        (out / name).write_text("# Doc [SEC-001]\n" + line * (id_scan.POOL_MIN_BYTES // len(line) // 2 + 1))
+    monkeypatch.setenv("PROMPTOPS_CACHE", "0")
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    check = next(c for c in CHECKS if c.name == "fingerprint")
+    res, = Verifier(tmp_path).run_checks([check])
+    assert res.returncode == 0, res.stderr
+    assert "Sync fingerprint OK." in res.stdout
+    assert (tmp_path / "sync_fingerprint.json").exists()
+
+def test_check_inputs_follow_imports(tmp_path, monkeypatch):
+    (tmp_path / "tools").mkdir()
+    shutil.copy(ROOT / "fingerprint_sync.py", tmp_path / "tools" / "fingerprint_sync.py")
+    for name in ("id_scan.py", "manifests.py", "yaml_cache.py", "cache_config.py"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    assert module_deps("tools/fingerprint_sync.py") == [
+        "cache_config.py", "id_scan.py", "manifests.py", "tools/fingerprint_sync.py", "yaml_cache.py"]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Assert an import-time budget for each CLI entry point.
+
+Usage:
+  python tools/startup_budget.py [--root .] [--repeat 5] [--scale 1.0]
+
+- Imports each entry point in a fresh interpreter with `python -X importtime` and takes
+  the best cumulative import time over --repeat runs.
+- Fails when an entry point exceeds its budget (ms, multiplied by --scale for slow CI
+  runners) or pulls in a heavy dependency at module load (those belong inside the
+  code path that needs them).
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# entry point -> import budget in ms (roughly 2x the time measured on a laptop)
+BUDGETS: Dict[str, int] = {
+    "sync_orchestrator.py": 200,
+    "compile_prompt.py": 150,
+    "prompt_coverage_checker.py": 150,
+    "eval_harness.py": 150,
+    "id_integrity_check.py": 150,
+    "fingerprint_sync.py": 100,
+    "golden_diff.py": 100,
+    "cross_domain_technique_check.py": 150,
+    "impact_analysis.py": 100,
+    "project_sync_orchestrator.py": 100,
+    "validate_live_configs.py": 150,
+    "validate_spec.py": 100,
+    "tools/validate_prompts.py": 150,
+}
+HEAVY = ("pandas", "numpy", "jsonschema", "networkx")
+
+
+def import_profile(root: Path, entry: str) -> Tuple[int, List[str]]:
+    """(cumulative import time in us, modules imported) for one fresh import of entry."""
+    path = root / entry
+    code = f"import sys; sys.path.insert(0, {str(path.parent)!r}); import {path.stem}"
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=root,
+                       capture_output=True, text=True)
+    if p.returncode != 0:
+        raise RuntimeError(p.stderr.strip().splitlines()[-1] if p.stderr.strip() else f"exit {p.returncode}")
+    total, modules = 0, []
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.append(name.strip())
+        if name.rstrip() == f" {path.stem}":  # top level (nested imports are indented further)
+            total = int(cumulative)
+    return total, modules
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default=".", help="Repository root (default: .)")
+    ap.add_argument("--repeat", type=int, default=5, help="Fresh imports per entry point; the best run counts")
+    ap.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (e.g. 2 on slow runners)")
+    args = ap.parse_args()
+    root = Path(args.root).resolve()
+
+    failed = 0
+    print(f"{'Entry point':40} {'Import ms':>10} {'Budget ms':>10}")
+    for entry, budget in BUDGETS.items():
+        if not (root / entry).exists():
+            continue
+        try:
+            runs = [import_profile(root, entry) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(f"{entry:40} {'ERROR':>10} {budget * args.scale:>10.0f}  {e}")
+            failed += 1
+            continue
+        best = min(t for t, _ in runs) / 1000
+        heavy = sorted(set(runs[0][1]) & set(HEAVY))
+        problems = []
+        if best > budget * args.scale:
+            problems.append("over budget")
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)} at load")
+        print(f"{entry:40} {best:>10.1f} {budget * args.scale:>10.0f}  {'; '.join(problems) or 'ok'}")
+        failed += bool(problems)
+
+    print(f"\n{failed} entry point(s) failed." if failed else "\nAll entry points within budget.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
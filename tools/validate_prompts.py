@@ -2,50 +2,163 @@
 """Validate prompt/config YAML files against a JSON Schema.
 
 Usage:
-  python tools/validate_prompts.py --schema prompt_schema_min.json [--root .]
+  python tools/validate_prompts.py --schema prompt_schema_min.json [--root .] [--jobs N] [--fail-fast]
+                                   [--exclude GLOB ...] [--no-cache]
 
-- Finds YAML-like files commonly used in this repo (Prompt*.yaml, *manifest*.yaml, *rules*.yaml, *.yml).
-- Validates each against the provided JSON schema.
-- Prints a summary table and exits nonzero on any failure.
+- Finds YAML-like files commonly used in this repo (Prompt*.yaml, *manifest*.yaml, *rules*.yaml, *.yml):
+  `git ls-files` (tracked + untracked, .gitignore honoured) when root is in a git work tree,
+  else a single walk that also prunes root .gitignore patterns. DEFAULT_EXCLUDES (VCS, virtualenv,
+  node_modules, build output) and --exclude globs apply either way, matched against the relative
+  path and each of its components.
+- Validates each against the provided JSON schema; with --jobs N > 1, on a pool of N processes.
+- Streams a PASS/FAIL line per file as it finishes, then a summary (failures sorted by path).
+- --fail-fast stops at the first failure; files not yet validated are reported as not run.
+- Results are cached by (file content hash, schema hash) in <cache dir>/validate_prompts.json
+  (cache_config, resolved against --root); file hashes are reused under input_cache's
+  racy-clean stat rule.
+- Exits nonzero on any failure.
 
 Requires: pyyaml, jsonschema
 """
 from __future__ import annotations
 
 import argparse
+import fnmatch
+import hashlib
 import json
-import sys
+import os
 import re
+import subprocess
+import sys
 from pathlib import Path
 from typing import List, Tuple
 
 import yaml  # type: ignore
-from jsonschema import Draft202012Validator, exceptions as jsonschema_exceptions  # type: ignore
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo-root helper modules
+from cache_config import cache_dir, cache_enabled  # noqa: E402
+from input_cache import FileHashes  # noqa: E402
 
 
-PATTERNS = [
+PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
     r"""^Prompt.*\.ya?ml$""",
     r""".*manifest.*\.ya?ml$""",
     r""".*rules.*\.ya?ml$""",
     r""".*config.*\.ya?ml$""",
     r""".*\.ya?ml$""",  # fallback catch-all
-]
+)]
+DEFAULT_EXCLUDES = [".git", ".hg", ".svn", ".venv", "venv", "node_modules", "__pycache__",
+                    ".tox", ".nox", ".promptops-cache", "build", "dist"]
+CACHE_VERSION = 2
+
+
+def excluded(rel: str, patterns: List[str]) -> bool:
+    parts = rel.split("/")
+    return any(fnmatch.fnmatch(rel, pat) or any(fnmatch.fnmatch(part, pat) for part in parts) for pat in patterns)
 
 
-def discover_yaml_files(root: Path) -> List[Path]:
-    candidates: List[Path] = []
-    for p in root.rglob("*.yaml"):
-        candidates.append(p)
-    for p in root.rglob("*.yml"):
-        candidates.append(p)
+def git_yaml_files(root: Path):
+    """Relative paths from git (tracked and untracked, minus ignored), or None outside a work tree."""
+    try:
+        res = subprocess.run(["git", "-C", str(root), "ls-files", "-z", "--cached", "--others",
+                              "--exclude-standard", "--", "*.yaml", "*.yml"], capture_output=True)
+    except OSError:
+        return None
+    if res.returncode != 0:
+        return None
+    return [p for p in res.stdout.decode("utf-8", "surrogateescape").split("\0") if p]
+
+
+def gitignore_patterns(root: Path) -> List[str]:
+    try:
+        lines = (root / ".gitignore").read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    return [l.strip().strip("/") for l in lines if l.strip() and not l.startswith(("#", "!"))]
+
+
+def walk_yaml_files(root: Path, skip: List[str]) -> List[str]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        dirnames[:] = [d for d in dirnames if not excluded(rel_dir + d, skip)]
+        found += [rel_dir + n for n in filenames if n.endswith((".yaml", ".yml"))]
+    return found
+
+
+def discover_yaml_files(root: Path, exclude: List[str] = ()) -> List[Path]:
+    skip = DEFAULT_EXCLUDES + list(exclude)
+    rels = git_yaml_files(root)
+    if rels is None:
+        rels = walk_yaml_files(root, skip + gitignore_patterns(root))
+    candidates = {root / r for r in rels if not excluded(r, skip)}
     # simple priority ordering: earlier patterns first
     def priority(path: Path) -> Tuple[int, str]:
         name = str(path.as_posix())
         for i, pat in enumerate(PATTERNS):
-            if re.search(pat, name, re.IGNORECASE):
+            if pat.search(name):
                 return (i, name)
         return (len(PATTERNS), name)
-    return sorted(set(candidates), key=priority)
+    return sorted((p for p in candidates if p.is_file()), key=priority)
+
+
+class ResultCache:
+    """(file content hash, schema hash) -> (ok, errors); errors are stored without the path prefix."""
+    def __init__(self, path: Path, schema_hash: str, enabled: bool = True):
+        self.path, self.schema_hash, self.enabled = path, schema_hash, enabled
+        data = {}
+        if enabled:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+        if data.get("version") != CACHE_VERSION:
+            data = {}
+        self.files = FileHashes(data.get("hashes"), data.get("stats"), data.get("stat_time_ns", 0))
+        self.results = data.get("results", {})
+
+    def key(self, fp: Path) -> str:
+        h = self.files.hashes.get(str(fp)) or self.files.digest(fp)
+        return f"{h}:{self.schema_hash}"
+
+    def get(self, fp: Path):
+        hit = self.results.get(self.key(fp)) if self.enabled else None
+        if hit is None:
+            return None
+        ok, errors = hit
+        return ok, [f"{fp}: {e}" for e in errors]
+
+    def put(self, fp: Path, ok: bool, errors: List[str]) -> None:
+        if not self.enabled:
+            return
+        prefix = f"{fp}: "
+        self.results[self.key(fp)] = [ok, [e[len(prefix):] if e.startswith(prefix) else e for e in errors]]
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        # only the results for files seen this run are kept, so the cache tracks the tree
+        state = self.files.state()
+        live = {f"{h}:{self.schema_hash}" for h in state["hashes"].values()}
+        data = {"version": CACHE_VERSION, **state, "results": {k: v for k, v in self.results.items() if k in live}}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def schema_hash(schema) -> str:
+    try:
+        from importlib.metadata import version
+        jsv = version("jsonschema")
+    except Exception:
+        jsv = "?"
+    blob = json.dumps(schema, sort_keys=True) + f"|{jsv}|{yaml.__version__}"
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
 
 
 def load_schema(schema_path: Path):
@@ -54,6 +167,7 @@ def load_schema(schema_path: Path):
 
 
 def validate_one(validator, path: Path) -> Tuple[bool, List[str]]:
+    from jsonschema import exceptions as jsonschema_exceptions  # type: ignore
     errors: List[str] = []
     try:
         with path.open("r", encoding="utf-8") as f:
@@ -69,10 +183,52 @@ def validate_one(validator, path: Path) -> Tuple[bool, List[str]]:
     return len(errors) == 0, errors
 
 
+_VALIDATOR = None
+
+
+def _init_worker(schema) -> None:
+    global _VALIDATOR
+    from jsonschema import Draft202012Validator  # type: ignore
+    _VALIDATOR = Draft202012Validator(schema)
+
+
+def _check(path: Path) -> Tuple[Path, bool, List[str]]:
+    ok, errors = validate_one(_VALIDATOR, path)
+    return path, ok, errors
+
+
+def run_serial(schema, files: List[Path], fail_fast: bool):
+    _init_worker(schema)
+    for fp in files:
+        result = _check(fp)
+        yield result
+        if fail_fast and not result[1]:
+            return
+
+
+def run_pool(schema, files: List[Path], jobs: int, fail_fast: bool):
+    """Results in completion order; on fail-fast, pending files are cancelled."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    ex = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(schema,))
+    try:
+        futures = [ex.submit(_check, fp) for fp in files]
+        for fut in as_completed(futures):
+            result = fut.result()
+            yield result
+            if fail_fast and not result[1]:
+                return
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--schema", required=True, help="Path to JSON schema file (e.g., prompt_schema_min.json)")
     ap.add_argument("--root", default=".", help="Root directory to scan (default: .)")
+    ap.add_argument("--jobs", type=int, default=1, help="Validate on N worker processes (default: 1)")
+    ap.add_argument("--fail-fast", action="store_true", help="Stop at the first failing file")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob to skip (repeatable)")
+    ap.add_argument("--no-cache", action="store_true", help="Re-validate every file")
     args = ap.parse_args()
 
     root = Path(args.root).resolve()
@@ -83,38 +239,60 @@ def main() -> int:
         return 2
 
     schema = load_schema(schema_path)
-    validator = Draft202012Validator(schema)
 
-    files = discover_yaml_files(root)
+    files = discover_yaml_files(root, args.exclude)
     if not files:
         print("No YAML files found. Nothing to validate.")
         return 0
 
-    total = 0
-    passed = 0
-    failed = 0
-    failures: List[str] = []
+    cache = ResultCache(cache_dir(base=root) / "validate_prompts.json", schema_hash(schema),
+                        enabled=not args.no_cache and cache_enabled(base=root))
+    results = {}
+    print(f"Validating {len(files)} YAML files against schema: {schema_path.name}\n", flush=True)
 
-    print(f"Validating {len(files)} YAML files against schema: {schema_path.name}\n")
-    for fp in files:
-        total += 1
-        ok, errors = validate_one(validator, fp)
+    def report(fp: Path, ok: bool, errors: List[str], note: str = "") -> None:
+        results[fp] = (ok, errors)
         if ok:
-            print(f"✔ PASS: {fp}")
-            passed += 1
+            print(f"✔ PASS: {fp}{note}", flush=True)
         else:
-            print(f"✖ FAIL: {fp}")
+            print(f"✖ FAIL: {fp}{note}", flush=True)
             for e in errors:
-                print(f"    • {e}")
-            failed += 1
-            failures.extend(errors)
+                print(f"    • {e}", flush=True)
+
+    todo = []
+    for fp in files:
+        hit = cache.get(fp)
+        if hit is None:
+            todo.append(fp)
+            continue
+        report(fp, *hit, note=" (cached)")
+        if args.fail_fast and not hit[0]:
+            todo = []
+            break
+    if todo:
+        if args.jobs > 1 and len(todo) > 1:
+            stream = run_pool(schema, todo, min(args.jobs, len(todo)), args.fail_fast)
+        else:
+            stream = run_serial(schema, todo, args.fail_fast)
+        for fp, ok, errors in stream:
+            cache.put(fp, ok, errors)
+            report(fp, ok, errors)
+    cache.save()
 
+    failures = sorted(fp for fp, (ok, _) in results.items() if not ok)
+    passed = len(results) - len(failures)
     print("\nSummary:")
-    print(f"  Total:  {total}")
+    print(f"  Total:  {len(files)}")
     print(f"  Passed: {passed}")
-    print(f"  Failed: {failed}")
+    print(f"  Failed: {len(failures)}")
+    if len(results) < len(files):
+        print(f"  Not run (fail-fast): {len(files) - len(results)}")
+    if failures:
+        print("\nFailed files:")
+        for fp in failures:
+            print(f"  {fp} ({len(results[fp][1])} error(s))")
 
-    return 0 if failed == 0 else 1
+    return 0 if not failures else 1
 
 
 if __name__ == "__main__":
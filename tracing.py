@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+tracing.py
+Lightweight stage spans, exported as Chrome/Perfetto trace JSON (chrome://tracing, ui.perfetto.dev).
+
+    tracing.init("sync_orchestrator", "trace.json")   # or set PROMPTOPS_TRACE=trace.json
+    with tracing.span("compile", bytes=n):
+        ...
+
+The trace path travels in PROMPTOPS_TRACE, so child processes (subprocess checks, pool
+workers) that call init() join the same trace: every process appends its events as JSON
+lines to <trace>.events, and the process that started the trace merges them into <trace>
+when it exits. With no trace configured, span() is a no-op.
+
+Events are kept in memory only between mark() and drain(), for per-run summaries:
+
+    m = tracing.mark()
+    ...
+    print(tracing.summary_markdown(tracing.drain(m)))
+"""
+import atexit, itertools, json, os, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+
+ENV = "PROMPTOPS_TRACE"
+ROOT_ENV = "PROMPTOPS_TRACE_ROOT"
+_events = []  # this process's events since the oldest open mark
+_marks = {}  # open mark -> its start in _events
+_mark_ids = itertools.count(1)
+_lock = threading.Lock()
+
+def enabled() -> bool:
+    return bool(os.environ.get(ENV))
+
+def _events_path() -> Path:
+    return Path(os.environ[ENV] + ".events")
+
+def _now_us() -> int:
+    # CLOCK_MONOTONIC is system-wide, so timestamps line up across processes
+    return time.monotonic_ns() // 1000
+
+def _emit(ev: dict):
+    with _lock:
+        if _marks:
+            _events.append(ev)
+        with open(_events_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(ev) + "\n")
+
+def init(process_name: str, trace_path=None):
+    """Join (or start) a trace. The first process to start it writes the final file at exit."""
+    if trace_path:
+        os.environ[ENV] = str(Path(trace_path).resolve())
+    if not enabled():
+        return
+    if ROOT_ENV not in os.environ:
+        os.environ[ROOT_ENV] = str(os.getpid())
+        try:
+            _events_path().unlink()
+        except OSError:
+            pass
+        atexit.register(finish)
+    _emit({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": process_name}})
+
+@contextmanager
+def span(name: str, **args):
+    if not enabled():
+        yield
+        return
+    t0 = _now_us()
+    try:
+        yield
+    finally:
+        _emit({"name": name, "cat": name.split(".")[0], "ph": "X", "ts": t0, "dur": _now_us() - t0,
+               "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
+
+def finish():
+    if not enabled() or os.environ.get(ROOT_ENV) != str(os.getpid()):
+        return
+    events = []
+    try:
+        with open(_events_path(), "r", encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        _events_path().unlink()
+    except (OSError, ValueError):
+        pass
+    Path(os.environ[ENV]).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    print(f"Wrote trace {os.environ[ENV]}")
+
+def mark() -> int:
+    """Start keeping this process's events in memory; pass the result to drain()."""
+    with _lock:
+        m = next(_mark_ids)
+        _marks[m] = len(_events)
+        return m
+
+def drain(m: int) -> list:
+    """Events recorded since mark m, closing it; memory is released once no mark is open.
+    A mark that was already drained gives []."""
+    with _lock:
+        start = _marks.pop(m, None)
+        events = [] if start is None else _events[start:]
+        if not _marks:
+            _events.clear()
+        return events
+
+def summary_markdown(events: list) -> str:
+    """Per-stage totals for the spans in events (see drain()) recorded by this process, as a Markdown table."""
+    rows = {}
+    for ev in events:
+        if ev.get("ph") != "X" or ev.get("pid") != os.getpid():
+            continue
+        r = rows.setdefault(ev["name"], [0, 0, 0, 0])
+        r[0] += 1
+        r[1] += ev["dur"]
+        r[2] = max(r[2], ev["dur"])
+        r[3] += ev["args"].get("bytes", 0) or 0
+    lines = ["| Stage | Calls | Total ms | Max ms | Input bytes |", "|---|---|---|---|---|"]
+    for name, (n, total, mx, size) in sorted(rows.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f"| {name} | {n} | {total / 1000:.1f} | {mx / 1000:.1f} | {size} |")
+    return "\n".join(lines)
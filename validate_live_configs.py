@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
-import json, sys, yaml
+import json, sys
 from pathlib import Path
-from jsonschema import validate, Draft202012Validator
+from yaml_cache import load_yaml
 
 BASE = Path(".")
 SCHEMAS = BASE / "SPEC" / "schemas"
 
 def load_json(p): return json.loads(Path(p).read_text(encoding="utf-8"))
-def load_yaml(p): return yaml.safe_load(Path(p).read_text(encoding="utf-8"))
 
 def must_schema(name):
     sp = SCHEMAS / name
@@ -15,10 +14,12 @@ def must_schema(name):
         print(f"[SCHEMA MISSING] {name}", file=sys.stderr)
         sys.exit(1)
     s = load_json(sp)
+    from jsonschema import Draft202012Validator
     Draft202012Validator.check_schema(s)
     return s
 
 def main():
+    from jsonschema import validate  # deferred: slow to import, only needed once work starts
     errs = 0
 
     # PromptSpec.yaml
@@ -5,7 +5,6 @@ Validates JSON Schemas in SPEC/schemas and example instances in SPEC/examples.
 """
 import json, sys
 from pathlib import Path
-from jsonschema import Draft202012Validator, validate
 
 BASE = Path(__file__).resolve().parents[1]
 SCHEMAS = BASE / "schemas"
@@ -16,6 +15,7 @@ def load_json(p: Path):
         return json.load(f)
 
 def main():
+    from jsonschema import Draft202012Validator, validate
     # Load schemas
     schema_files = sorted(SCHEMAS.glob("*.json"))
     schemas = {}
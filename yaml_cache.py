@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+yaml_cache.py
+Shared YAML loader for all PromptOps/DocOps tools.
+
+- Parses with libyaml's CSafeLoader when PyYAML was built with it (SafeLoader otherwise).
+- Keeps parsed documents in an on-disk cache (marshal, keyed by content hash), so
+  the same PromptSpec/checklist/docs sources are parsed once across every tool run.
+- The cache is size-bounded; least recently used entries are evicted first.
+- Inside `with snapshot():` each file is read and parsed at most once per process (keyed by
+  path, size and mtime); every caller still gets its own copy, so checks sharing a
+  snapshot cannot see each other's mutations.
+
+Location and on/off come from cache_config; PROMPTOPS_YAML_CACHE_MB (default 64, 0 disables
+the disk cache) bounds its size.
+"""
+import copy, hashlib, marshal, os, sys, yaml
+from contextlib import contextmanager
+from pathlib import Path
+from cache_config import cache_enabled, cache_path
+from tracing import span
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+CACHE_DIR = cache_path("yaml")
+MAX_BYTES = int(float(os.environ.get("PROMPTOPS_YAML_CACHE_MB", "64")) * 1024 * 1024) if cache_enabled() else 0
+_SNAPSHOT = None
+# Parsed objects depend on PyYAML and marshal formats on the interpreter version
+_SALT = f"{yaml.__version__}|{Loader.__name__}|{marshal.version}|{sys.version_info[:2]}".encode()
+
+def parse(data):
+    return yaml.load(data, Loader=Loader)
+
+def cache_key(data: bytes) -> str:
+    return hashlib.sha256(_SALT + data).hexdigest()
+
+def _entry(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.bin"
+
+def _get(key: str):
+    p = _entry(key)
+    try:
+        blob = p.read_bytes()
+        os.utime(p)  # mtime doubles as the LRU clock
+        return True, marshal.loads(blob)
+    except (OSError, ValueError, EOFError, TypeError):
+        return False, None
+
+def _put(key: str, doc):
+    try:
+        blob = marshal.dumps(doc)
+    except ValueError:
+        return  # e.g. timestamps; such documents are just parsed every time
+    p = _entry(key)
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, p)
+        evict()
+    except OSError:
+        pass
+
+def evict(max_bytes: int = None):
+    """Drop least recently used entries until the cache fits in max_bytes."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        entries = [(e.stat(), e) for e in CACHE_DIR.glob("*/*.bin")]
+    except OSError:
+        return
+    total = sum(st.st_size for st, _ in entries)
+    if total <= max_bytes:
+        return
+    for st, e in sorted(entries, key=lambda x: x[0].st_mtime_ns):
+        try:
+            e.unlink()
+        except OSError:
+            continue
+        total -= st.st_size
+        if total <= max_bytes * 0.8:
+            break
+
+def loads(data: bytes):
+    """Parse YAML bytes, serving repeat content from the disk cache."""
+    if MAX_BYTES <= 0:
+        return parse(data)
+    key = cache_key(data)
+    hit, doc = _get(key)
+    if hit:
+        return doc
+    doc = parse(data)
+    _put(key, doc)
+    return doc
+
+@contextmanager
+def snapshot():
+    """Share parsed files across everything that runs inside the block (threads included)."""
+    global _SNAPSHOT
+    outer, _SNAPSHOT = _SNAPSHOT, ({} if _SNAPSHOT is None else _SNAPSHOT)
+    try:
+        yield
+    finally:
+        _SNAPSHOT = outer
+
+def load_yaml(path):
+    snap = _SNAPSHOT
+    if snap is not None:
+        st = os.stat(path)
+        key = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+        if key in snap:
+            kind, value = snap[key]
+            return marshal.loads(value) if kind == "m" else copy.deepcopy(value)
+    data = Path(path).read_bytes()
+    with span("yaml_load", path=str(path), bytes=len(data)):
+        doc = loads(data)
+    if snap is not None:
+        try:
+            snap[key] = ("m", marshal.dumps(doc))
+        except ValueError:
+            snap[key] = ("d", copy.deepcopy(doc))  # not marshalable (e.g. timestamps)
+    return doc